@@ -0,0 +1,118 @@
+""" This code benchmarks the fetch layer against the local mock GitHub API.
+    It reports pages per second, requests per output record and wall time
+    for the repository download, user profile and event stream helpers.
+"""
+import tempfile
+import asyncio
+import shutil
+import time
+import os
+import mock_github
+import github_api
+import dataset_io
+import download_repo_data
+import filter_contributors
+import parquet_store
+
+BENCHMARK_REPOS = 2
+
+def count_records(repo_list):
+    """
+    Function that counts the records saved for a list of repositories.
+    """
+    return sum(
+        len(dataset_io.load_dataset(repo["name"], data_type))
+        for repo in repo_list
+        for data_type in download_repo_data.DATA_TYPES
+        if dataset_io.dataset_exists(repo["name"], data_type)
+    )
+
+def measure(mock, name, function):
+    """
+    Function that runs one benchmark and returns its statistics.
+    The function returns the number of records it produced.
+    """
+    requests_before, pages_before = mock.requests(), mock.pages
+    start = time.time()
+    records = function()
+    wall_time = time.time() - start
+    requests = mock.requests() - requests_before
+    pages = mock.pages - pages_before
+    return {
+        "benchmark": name,
+        "requests": requests,
+        "pages": pages,
+        "records": records,
+        "wall_time": wall_time,
+        "pages_per_second": pages / wall_time if wall_time else 0,
+        "requests_per_record": requests / records if records else 0,
+    }
+
+def print_results(results):
+    """
+    Function that prints the benchmark statistics as a table.
+    """
+    print(f"{'benchmark':<28}{'requests':>10}{'pages':>8}{'records':>10}{'wall (s)':>10}{'pages/s':>10}{'req/record':>12}")
+    for row in results:
+        print(f"{row['benchmark']:<28}{row['requests']:>10}{row['pages']:>8}{row['records']:>10}"
+              f"{row['wall_time']:>10.2f}{row['pages_per_second']:>10.1f}{row['requests_per_record']:>12.3f}")
+
+def main(repos=BENCHMARK_REPOS, latency=mock_github.LATENCY, error_rate=mock_github.ERROR_RATE,
+         forbidden_rate=mock_github.FORBIDDEN_RATE):
+    mock = mock_github.MockGitHub(latency=latency, error_rate=error_rate, forbidden_rate=forbidden_rate)
+    mock.start()
+    datasets = {f"repo{i}": mock_github.synthetic_repo("mock", f"repo{i}") for i in range(repos)}
+    for name, data in datasets.items():
+        mock.add_repo("mock", name, data)
+    repo_list = [mock.repo_object("mock", name, i + 1) for i, name in enumerate(datasets)]
+
+    # The download code writes to ../Datasets, run it from a scratch directory
+    working_directory = os.getcwd()
+    scratch = tempfile.mkdtemp()
+    os.makedirs(os.path.join(scratch, "src"))
+    os.chdir(os.path.join(scratch, "src"))
+    github_api.CACHE = None
+    results = []
+    try:
+        def download_sync():
+            for i, repo in enumerate(repo_list):
+                download_repo_data.read_repo_data(repo, i)
+            return count_records(repo_list)
+
+        def download_async():
+            shutil.rmtree("../Datasets", ignore_errors=True)
+            asyncio.run(download_repo_data.download_repos_async(repo_list))
+            return count_records(repo_list)
+
+        def user_data():
+            return sum(
+                1 for data in datasets.values() for contributor in data["contributors"]
+                if contributor["type"] != "Bot"
+                and filter_contributors.get_user_data(contributor["url"].replace(mock_github.GITHUB_URL, mock.base_url),
+                                                      contributor["id"])
+            )
+
+        def event_stream():
+            # The repository-wide event stream that replaced fetching events per issue and pull request
+            records = 0
+            for repo in repo_list:
+                download_repo_data.save_to_JSON("issue_events", download_repo_data.get_repo_urls(repo)["issue_events"],
+                                                repo["name"], f"../Datasets/{repo['name']}/")
+                records += sum(len(parquet_store.load_timeline(repo["name"], name)) for name in parquet_store.TIMELINES)
+            return records
+
+        results.append(measure(mock, "download_repo_data (sync)", download_sync))
+        results.append(measure(mock, "download_repo_data (async)", download_async))
+        results.append(measure(mock, "get_user_data", user_data))
+        results.append(measure(mock, "issue event stream", event_stream))
+    finally:
+        os.chdir(working_directory)
+        shutil.rmtree(scratch, ignore_errors=True)
+        mock.stop()
+
+    print_results(results)
+    print(f"Responses by status: {dict(mock.statuses)}")
+    return results
+
+if __name__ == "__main__":
+    main()
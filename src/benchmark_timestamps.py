@@ -0,0 +1,99 @@
+""" This code benchmarks timestamp parsing of API records.
+    It compares parsing every timestamp with a scalar pd.to_datetime call
+    inside the per-developer loops against parsing each repository once
+    into a polars column, as parquet_store does at conversion, that every
+    developer reuses through frame_nanoseconds or a TimestampIndex.
+"""
+import random
+import time
+import pandas as pd
+import polars as pl
+from timestamp_index import TimestampIndex, frame_nanoseconds
+
+TIMESTAMPS = 200_000  # timestamps in one repository
+DEVELOPERS = 20       # developers whose window is checked against every timestamp
+
+def github_timestamps(count, seed=0):
+    """
+    Function that returns random timestamps in the format of the GitHub API.
+    """
+    generator = random.Random(seed)
+    start = pd.Timestamp("2012-01-01", tz="UTC").value // 10 ** 9
+    end = pd.Timestamp("2024-01-01", tz="UTC").value // 10 ** 9
+    return [pd.Timestamp(generator.randrange(start, end), unit="s").strftime("%Y-%m-%dT%H:%M:%SZ") for _ in range(count)]
+
+def measure(name, timestamps, parses, function):
+    """
+    Function that runs one benchmark and returns its statistics.
+    The function returns the number of timestamps in the windows.
+    """
+    start = time.time()
+    in_window = function()
+    wall_time = time.time() - start
+    return {
+        "benchmark": name,
+        "parses": parses,
+        "in_window": in_window,
+        "wall_time": wall_time,
+        "timestamps_per_second": timestamps / wall_time if wall_time else 0,
+    }
+
+def print_results(results):
+    """
+    Function that prints the benchmark statistics as a table.
+    """
+    print(f"{'benchmark':<36}{'parses':>12}{'in window':>12}{'wall (s)':>10}{'timestamps/s':>16}")
+    for row in results:
+        print(f"{row['benchmark']:<36}{row['parses']:>12}{row['in_window']:>12}"
+              f"{row['wall_time']:>10.2f}{row['timestamps_per_second']:>16,.0f}")
+
+def main(timestamps=TIMESTAMPS, developers=DEVELOPERS):
+    values = github_timestamps(timestamps)
+    windows = [(date, date + pd.DateOffset(months=1))
+               for date in pd.to_datetime(random.Random(1).sample(values, developers), utc=True)]
+    results = []
+
+    def scalar_per_developer():
+        # Previous behaviour: every developer parses every timestamp again
+        count = 0
+        for start, end in windows:
+            for value in values:
+                if start <= pd.to_datetime(value) < end:
+                    count += 1
+        return count
+
+    def scalar_once():
+        dates = [pd.to_datetime(value) for value in values]
+        return sum(1 for start, end in windows for date in dates if start <= date < end)
+
+    def parse_frame():
+        # What parquet_store does at conversion time
+        return pl.DataFrame({"created_at": values}).with_columns(pl.col("created_at").str.to_datetime(time_zone="UTC"))
+
+    def frame_nanoseconds_once():
+        dates = frame_nanoseconds(parse_frame(), "created_at")
+        return sum(int(((start.value <= dates) & (dates < end.value)).sum()) for start, end in windows)
+
+    def timestamp_index_once():
+        index = TimestampIndex.from_frame(parse_frame(), "created_at")
+        return sum(index.count_between(start.value, end.value) for start, end in windows)
+
+    total = timestamps * developers
+    # The per-developer scalar loop is slow, time it on a sample and scale it up
+    sample = max(1, timestamps // 20)
+    full_values, values = values, values[:sample]
+    row = measure("scalar pd.to_datetime per developer", sample * developers, sample * developers, scalar_per_developer)
+    row.update(parses=total, in_window="-", wall_time=row["wall_time"] * timestamps / sample)
+    results.append(row)
+    values = full_values
+    results.append(measure("scalar pd.to_datetime once", total, timestamps, scalar_once))
+    results.append(measure("frame_nanoseconds once", total, timestamps, frame_nanoseconds_once))
+    results.append(measure("TimestampIndex.from_frame once", total, timestamps, timestamp_index_once))
+
+    print(f"{timestamps} timestamps, {developers} developer windows "
+          f"(first row extrapolated from {sample} timestamps)")
+    print_results(results)
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,9 @@ from nltk.sentiment import SentimentIntensityAnalyzer
 from dateutil.relativedelta import relativedelta
 from langdetect import detect
 import unicodedata
+import dataset_io
+import parquet_store
+import polars as pl
 
 # Ensure required NLTK data is downloaded
 nltk.download('punkt')
@@ -26,6 +29,7 @@ lemmatizer = WordNetLemmatizer()
 sia = SentimentIntensityAnalyzer()
 
 MAX_GHTORRENT_DATE = pd.to_datetime("2021-03-06 23:57:37+00:00")  # Max date from GHTorrent data
+CREATED_AT = pl.col("created_at").dt.strftime("%Y-%m-%dT%H:%M:%SZ")  # same format as the API
 
 def clean_text(text):
     try:
@@ -83,25 +87,20 @@ def save_commit_comments(repo_list):
     for i, repo in enumerate(repo_list): 
         repo_name = repo["name"]
         repo_id = repo["id"]
-        commit_path = f"../Datasets/{repo_name}/commits_{repo_name}.json"
-        comment_path = f"../Datasets/{repo_name}/commit_comments_{repo_name}.json"
-
-        if not os.path.exists(commit_path) or not os.path.exists(comment_path):
+        if not dataset_io.dataset_exists(repo_name, "commits") or not dataset_io.dataset_exists(repo_name, "commit_comments"):
             continue
 
         print(f"Processing repo commits {i}:{repo_name}...")
 
-        with open(commit_path, "r", encoding="utf-8") as f:
-            commits = json.load(f)
-        with open(comment_path, "r", encoding="utf-8") as f:
-            commit_comments = json.load(f)
+        commits = parquet_store.load_table(repo_name, "commits", ["sha", "author_id"])
+        commit_comments = parquet_store.load_table(repo_name, "commit_comments", ["commit_id", "body", CREATED_AT])
 
-        commit_user_map = {commit["sha"]: (commit.get("author") or {}).get("id", "") for commit in commits}
+        commit_user_map = dict(zip(commits["sha"], commits["author_id"]))
 
-        for comment in commit_comments:
-            commit_id = comment.get("commit_id")
-            comment_body = comment.get("body", "")
-            date = comment.get("created_at")
+        for comment in commit_comments.iter_rows(named=True):
+            commit_id = comment["commit_id"]
+            comment_body = comment["body"]
+            date = comment["created_at"]
             original_user = commit_user_map.get(commit_id, "")
 
             comment = clean_text(comment_body)
@@ -124,26 +123,23 @@ def save_pull_comments(repo_list):
     for i, repo in enumerate(repo_list): 
         repo_name = repo["name"]
         repo_id = repo["id"]
-        pr_path = f"../Datasets/{repo_name}/pull_requests_{repo_name}.json"
-        comments_path = f"../Datasets/{repo_name}/pull_request_comments_{repo_name}.json"
-
-        if not os.path.exists(pr_path) or not os.path.exists(comments_path):
+        if not dataset_io.dataset_exists(repo_name, "pull_requests") or not dataset_io.dataset_exists(repo_name, "pull_request_comments"):
             continue
 
         print(f"Processing repo pull {i}:{repo_name}...")
 
-        with open(pr_path, "r", encoding="utf-8") as f:
-            pull_requests = json.load(f)
-        with open(comments_path, "r", encoding="utf-8") as f:
-            pull_request_comments = json.load(f)
+        pull_requests = parquet_store.load_table(repo_name, "pull_requests", ["head_sha", "user_id"],
+                                                 pl.col("user_id").is_not_null())
+        pull_request_comments = parquet_store.load_table(repo_name, "pull_request_comments",
+                                                         ["commit_id", "body", CREATED_AT])
 
-        pr_user_map = {pr["head"]["sha"]: pr["user"]["id"] for pr in pull_requests if "user" in pr}
+        pr_user_map = dict(zip(pull_requests["head_sha"], pull_requests["user_id"]))
 
-        for comment in pull_request_comments:
-            pull_id = comment.get("commit_id")
-            comment_body = comment.get("body", "")
+        for comment in pull_request_comments.iter_rows(named=True):
+            pull_id = comment["commit_id"]
+            comment_body = comment["body"]
             original_user = pr_user_map.get(pull_id, "")
-            date = comment.get("created_at")
+            date = comment["created_at"]
             comment = clean_text(comment_body)
 
             if pull_id and original_user and comment:
@@ -164,26 +160,21 @@ def save_issue_comments(repo_list):
     for i, repo in enumerate(repo_list): 
         repo_name = repo["name"]
         repo_id = repo["id"]
-        issue_path = f"../Datasets/{repo_name}/issues_{repo_name}.json"
-        comment_path = f"../Datasets/{repo_name}/issue_comments_{repo_name}.json"
-
-        if not os.path.exists(issue_path) or not os.path.exists(comment_path):
+        if not dataset_io.dataset_exists(repo_name, "issues") or not dataset_io.dataset_exists(repo_name, "issue_comments"):
             continue
 
         print(f"Processing repo issue {i}:{repo_name}...")
 
-        with open(issue_path, "r", encoding="utf-8") as f:
-            issues = json.load(f)
-        with open(comment_path, "r", encoding="utf-8") as f:
-            issue_comments = json.load(f)
+        issues = parquet_store.load_table(repo_name, "issues", ["url", "user_id"], pl.col("user_id").is_not_null())
+        issue_comments = parquet_store.load_table(repo_name, "issue_comments", ["issue_url", "body", CREATED_AT])
 
-        issue_user_map = {issue["url"]: issue["user"]["id"] for issue in issues if "user" in issue}
+        issue_user_map = dict(zip(issues["url"], issues["user_id"]))
 
-        for comment in issue_comments:
-            issue_url = comment.get("issue_url")
-            comment_body = comment.get("body", "")
+        for comment in issue_comments.iter_rows(named=True):
+            issue_url = comment["issue_url"]
+            comment_body = comment["body"]
             original_user = issue_user_map.get(issue_url, "")
-            date = comment.get("created_at")
+            date = comment["created_at"]
             comment = clean_text(comment_body)
 
             if issue_url and original_user and comment:
@@ -234,9 +225,10 @@ def construct_tables(repo_list):
         with open(contributor_path, "r", encoding="utf-8") as f:
             contributors = json.load(f)
         
-        for c in contributors:
+        # Parse the dates of all contributors of the repository at once
+        contributor_dates = pd.to_datetime([c.get("created_date") for c in contributors], utc=True)
+        for c, contributor_date in zip(contributors, contributor_dates):
             contributor_id = c.get("id")
-            contributor_date = pd.to_datetime(c.get("created_date"))
             one_year_date = contributor_date + relativedelta(years=1)
         
             ltc_1 = 1 if c["one_year"] == "yes" else 0
@@ -0,0 +1,237 @@
+""" This code reads and writes the per-repository datasets.
+    Records are stored as newline-delimited JSON, optionally gzip compressed,
+    so pages can be appended as they arrive and read back as a stream.
+    Downloads write to a .partial file with a checkpoint after every page
+    and are only renamed to the final file once complete.
+"""
+import gzip
+import json
+import os
+
+DATASET_DIRECTORY = "../Datasets"
+COMPRESS = True  # write .ndjson.gz instead of .ndjson
+EXTENSIONS = [".ndjson.gz", ".ndjson", ".json"]  # lookup order, .json is the legacy format
+PARTIAL_SUFFIX = ".partial"
+CHECKPOINT_EXTENSION = ".checkpoint.json"
+
+class IncompleteDatasetError(Exception):
+    """
+    Raised when reading a dataset whose download has not finished.
+    """
+
+def dataset_file(repo_name, data_type, extension, directory=None):
+    """
+    Function that returns the path of a dataset file with the given extension.
+    """
+    directory = directory or os.path.join(DATASET_DIRECTORY, repo_name)
+    return os.path.join(directory, f"{data_type}_{repo_name}{extension}")
+
+def find_dataset(repo_name, data_type, directory=None):
+    """
+    Function that returns the path of the saved dataset or None.
+    """
+    for extension in EXTENSIONS:
+        path = dataset_file(repo_name, data_type, extension, directory)
+        if os.path.exists(path):
+            return path
+    return None
+
+def checkpoint_file(repo_name, data_type, directory=None):
+    """
+    Function that returns the path of the checkpoint of a dataset.
+    """
+    return dataset_file(repo_name, data_type, CHECKPOINT_EXTENSION, directory)
+
+def load_checkpoint(repo_name, data_type, directory=None):
+    """
+    Function that returns the checkpoint of an unfinished download or None.
+    A checkpoint whose partial file is missing or shorter than the
+    checkpointed bytes cannot be resumed and is discarded with it.
+    """
+    path = checkpoint_file(repo_name, data_type, directory)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        checkpoint = json.load(file)
+    partial_path = checkpoint["path"] + PARTIAL_SUFFIX
+    if not os.path.exists(partial_path) or os.path.getsize(partial_path) < checkpoint["bytes"]:
+        print(f"Discarding the checkpoint of {data_type} for {repo_name}, its partial file is missing or truncated.")
+        for stale_path in (partial_path, path):
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+        return None
+    return checkpoint
+
+def dataset_exists(repo_name, data_type, directory=None):
+    """
+    Function that checks if a dataset has been saved and its download finished.
+    """
+    return (find_dataset(repo_name, data_type, directory) is not None
+            and not os.path.exists(checkpoint_file(repo_name, data_type, directory)))
+
+def open_text(path, mode):
+    """
+    Function that opens a dataset file, decompressing .gz files.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def iter_dataset(repo_name, data_type, directory=None):
+    """
+    Function that yields the records of a dataset one at a time.
+    """
+    if os.path.exists(checkpoint_file(repo_name, data_type, directory)):
+        raise IncompleteDatasetError(f"Download of {data_type} for {repo_name} has not finished.")
+    path = find_dataset(repo_name, data_type, directory)
+    if path is None:
+        raise FileNotFoundError(dataset_file(repo_name, data_type, EXTENSIONS[0], directory))
+    yield from iter_file(path)
+
+def iter_file(path):
+    """
+    Function that yields the records of a dataset file one at a time.
+    """
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as file:
+            yield from json.load(file)
+        return
+    with open_text(path, "r") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+def load_dataset(repo_name, data_type, directory=None):
+    """
+    Function that returns all records of a dataset as a list.
+    """
+    return list(iter_dataset(repo_name, data_type, directory))
+
+class DatasetWriter:
+    """
+    Writer that appends pages of records to a dataset as they arrive.
+    Every page is flushed to the .partial file followed by a checkpoint
+    holding the next URL, so an interrupted download can be resumed.
+    Each page is its own gzip member, which keeps truncation at a
+    checkpoint safe. Files of the same dataset in other formats are
+    removed once the download completes. With resumable=False no
+    checkpoint is kept: an interrupted write leaves only a stale .partial
+    file and the previous dataset stays complete and readable.
+    """
+    def __init__(self, repo_name, data_type, directory=None, compress=COMPRESS, next_url=None, checkpoint=None,
+                 resumable=True):
+        self.repo_name = repo_name
+        self.data_type = data_type
+        self.directory = directory
+        self.checkpoint_path = checkpoint_file(repo_name, data_type, directory)
+        self.resumable = resumable
+        self.closed = False
+        if checkpoint:
+            # Drop anything written after the last checkpoint and continue from there
+            self.path = checkpoint["path"]
+            self.partial_path = self.path + PARTIAL_SUFFIX
+            self.file = open(self.partial_path, "ab")
+            self.file.truncate(checkpoint["bytes"])
+            self.file.seek(checkpoint["bytes"])
+            self.count = checkpoint["records"]
+            self.pages = checkpoint["pages"]
+            self.next_url = checkpoint["next_url"]
+        else:
+            extension = ".ndjson.gz" if compress else ".ndjson"
+            self.path = dataset_file(repo_name, data_type, extension, directory)
+            self.partial_path = self.path + PARTIAL_SUFFIX
+            self.file = open(self.partial_path, "wb")
+            self.count = 0
+            self.pages = 0
+            self.next_url = next_url
+            self.save_checkpoint()
+
+    def save_checkpoint(self):
+        """
+        Function that atomically records how far the download got.
+        """
+        if not self.resumable:
+            return
+        checkpoint = {
+            "path": self.path,
+            "next_url": self.next_url,
+            "records": self.count,
+            "pages": self.pages,
+            "bytes": self.file.tell()
+        }
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(checkpoint, file)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def write_page(self, records, next_url=None):
+        """
+        Function that appends a page of records and checkpoints
+        the URL of the page that comes after it.
+        """
+        data = "".join(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in records
+        ).encode("utf-8")
+        if self.path.endswith(".gz"):
+            data = gzip.compress(data)
+        self.file.write(data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.count += len(records)
+        self.pages += 1
+        self.next_url = next_url
+        self.save_checkpoint()
+
+    def close(self):
+        """
+        Function that completes the download: the partial file
+        replaces the dataset and the checkpoint is removed.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.file.close()
+        os.replace(self.partial_path, self.path)
+        if self.resumable:
+            os.remove(self.checkpoint_path)  # only once the dataset is in place
+        for extension in EXTENSIONS:
+            path = dataset_file(self.repo_name, self.data_type, extension, self.directory)
+            if path != self.path and os.path.exists(path):
+                os.remove(path)
+
+    def abort(self):
+        """
+        Function that stops an unfinished download, keeping
+        the partial file and checkpoint for a later resume.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.file.close()
+
+    def discard(self):
+        """
+        Function that drops an unfinished download that cannot be
+        resumed, leaving any previously completed dataset untouched.
+        """
+        self.abort()
+        for path in (self.partial_path, self.checkpoint_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def write_dataset(repo_name, data_type, records, directory=None):
+    """
+    Function that saves a complete list of records as a dataset.
+    """
+    with DatasetWriter(repo_name, data_type, directory) as writer:
+        writer.write_page(records)
+    return writer.path
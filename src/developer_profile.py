@@ -1,46 +1,27 @@
 """ This code collects data for the Developer Profile feature table.
 """
-from dotenv import load_dotenv
 import polars as pl
 import pandas as pd
-import requests
+import github_api
+import user_store
+import parquet_store
+from table_writer import TableWriter
+from timestamp_index import GroupedTimestamps, to_nanoseconds
 import os
 import re
+import sys
 import json
-import time
-from concurrent.futures import ThreadPoolExecutor
+import parallel
 
-load_dotenv()
-
-GITHUB_TOKEN = os.getenv("GIT_TOKEN3")
 MAX_GHTORRENT_DATE = pd.to_datetime("2021-03-06 23:57:37+00:00")  # Max date from GHTorrent data
-HEADERS = {
-    "Authorization": f"token {GITHUB_TOKEN}"
-}
-
-def check_rate_limit():
-    response = requests.get("https://api.github.com/rate_limit", headers=HEADERS)
-    if response.status_code == 200:
-        rate_limit = response.json()
-        remaining = rate_limit["rate"]["remaining"]
-        reset_time = rate_limit["rate"]["reset"]
-        # print(f"\t\tRemaining Requests: {remaining}, Reset Time: {time.ctime(reset_time)}")
-        return remaining, reset_time
-    return 0, 0
+TABLE_DIRECTORY = "../Tables/DeveloperProfiles"
 
 def get_github_data(url):
     url = re.sub(r"\{.*?\}", "", url)  # Clean URL placeholders
     collected_data = []
     params = {"per_page":100}
     while url:
-        remaining, reset_time = check_rate_limit()
-        if remaining == 0:
-            wait_time = max(1, reset_time - time.time())
-            print(f"\tRate limit exceeded! Waiting {wait_time:.2f} seconds before retrying...")
-            time.sleep(wait_time + 5)
-            continue
-        
-        response = requests.get(url, headers=HEADERS, params=params)    
+        response = github_api.get(url, params=params)    
         if response.status_code != 200:
             break
         data = response.json()
@@ -48,13 +29,19 @@ def get_github_data(url):
         url = response.links.get('next', {}).get('url')
     return collected_data
 
-def get_own_count(registration_date, url):
+def get_own_count(registration_date, url, user_id=None):
     """
     Function that returns the total of items
     filtered registration_date in any passed url
-    with date data
+    with date data. With a user_id the items are
+    kept in the user store.
     """
-    dataset = get_github_data(url)
+    if user_id is None:
+        dataset = get_github_data(url)
+    else:
+        dataset = user_store.get_user(user_id, "repos", lambda: [
+            {"id": data["id"], "created_at": data["created_at"]} for data in get_github_data(url)
+        ])
     if not dataset:  # Check if repos is None or empty
         return 0  # Return 0 instead of printing
     total = []
@@ -65,11 +52,11 @@ def get_own_count(registration_date, url):
     return len(total)  # Return the count for further use
 
 def get_watch_count(user_id, registration_date, watchers):
-    watches_filtered = watchers.filter(
-        (pl.col("user_id") == user_id) & 
-        (pl.col("created_at") <= registration_date)        
-    )
-    return watches_filtered.height
+    """
+    Function that returns the number of repositories a user
+    watched up to registration_date, from the per-user watch index.
+    """
+    return watchers.count_before(user_id, to_nanoseconds(registration_date))
 
 def get_pull_and_issues(user_id, registration_date, issues):
     issues_filtered = issues.filter(
@@ -122,68 +109,58 @@ def create_developer_profile(repo_num, repo_data, contributor_list, csv_path, wa
         "ltc_1", "ltc_2", "ltc_3"
     ]
 
-    # Check if the CSV file already exists
-    file_exists = os.path.isfile(csv_path)
-    # Load existing data if the file exists
-    if file_exists:
-        existing_df = pd.read_csv(csv_path)
-    else:
-        existing_df = pd.DataFrame(columns=columns)
-    new_data = []  # Store new rows before appending
+    # Users already in the CSV file are skipped, new rows are written in batches
+    new_data = TableWriter(csv_path, columns)
 
-    for i, contributor in enumerate(contributor_list):
-        username = contributor["login"]
-        user_id = contributor["id"]
-        registration_date = pd.to_datetime(contributor["registration_date"])
+    with new_data:
+        for i, contributor in enumerate(contributor_list):
+            username = contributor["login"]
+            user_id = contributor["id"]
+            registration_date = pd.to_datetime(contributor["registration_date"])
     
-        # Check if user already exists in the CSV
-        if file_exists and user_id in existing_df["user_id"].values:
-            print(f"{repo_num} {repo_name} - User {username} already exists in dataset, skipping...")
-            continue
-        elif registration_date >= MAX_GHTORRENT_DATE:
-            print(f"{repo_num}: {repo_name} - User {username} joined in {registration_date}, skipping...")
-            continue
-        else:
-            print(f"{repo_num} {repo_name} - Processing {i}: {username} out of {len(contributor_list)}")
-
-        ltc_1 = 1 if contributor["one_year"] == "yes" else 0
-        ltc_2 = 1 if contributor["one_year"] == "yes" and contributor["two_years"] == "yes" else 0
-        ltc_3 = 1 if contributor["LTC"] == "yes" else 0
-
-        # FEATURE 1 - days between registration and joining the repo
-        user_age = contributor["user_age"]
+            # Check if user already exists in the CSV
+            if user_id in new_data:
+                print(f"{repo_num} {repo_name} - User {username} already exists in dataset, skipping...")
+                continue
+            elif registration_date >= MAX_GHTORRENT_DATE:
+                print(f"{repo_num}: {repo_name} - User {username} joined in {registration_date}, skipping...")
+                continue
+            else:
+                print(f"{repo_num} {repo_name} - Processing {i}: {username} out of {len(contributor_list)}")
+
+            ltc_1 = 1 if contributor["one_year"] == "yes" else 0
+            ltc_2 = 1 if contributor["one_year"] == "yes" and contributor["two_years"] == "yes" else 0
+            ltc_3 = 1 if contributor["LTC"] == "yes" else 0
+
+            # FEATURE 1 - days between registration and joining the repo
+            user_age = contributor["user_age"]
         
-        # FEATURE 2 - number of repos the user owns before joining the repo
-        user_own_repos = get_own_count(registration_date, contributor["repos_url"])
+            # FEATURE 2 - number of repos the user owns before joining the repo
+            user_own_repos = get_own_count(registration_date, contributor["repos_url"], user_id)
         
-        # FEATURE 3 - number of repos a user watches
-        user_watch_repos = get_watch_count(user_id, registration_date, watchers)
+            # FEATURE 3 - number of repos a user watches
+            user_watch_repos = get_watch_count(user_id, registration_date, watchers)
     
-        # FEATURE 4 and 5
-        user_contribute_repos, user_history_commits = count_commits(user_id, registration_date, commits)
-        # FEATURE 6 and 7
-        user_history_pull_requests, user_history_issues = get_pull_and_issues(user_id, registration_date, issues)
-        # FEATURE 8
-        user_history_followers =  get_followers_count(user_id, registration_date, followers)
-
-        # Append new row to list
-        new_data.append([
-            repo_name, repo_id, user_id, user_age, registration_date.date(),
-            user_own_repos, 
-            user_watch_repos, 
-            user_contribute_repos, user_history_commits, 
-            user_history_pull_requests, user_history_issues, user_history_followers, 
-            ltc_1, ltc_2, ltc_3
-        ])
-        # Save to csv
-        temp_df = pd.DataFrame(new_data, columns=columns)
-        temp_df.to_csv(csv_path, mode="a", header=not file_exists, index=False)
-        file_exists = True  # Ensure header isn't written again after first write
-        new_data = []  # Clear new data list
+            # FEATURE 4 and 5
+            user_contribute_repos, user_history_commits = count_commits(user_id, registration_date, commits)
+            # FEATURE 6 and 7
+            user_history_pull_requests, user_history_issues = get_pull_and_issues(user_id, registration_date, issues)
+            # FEATURE 8
+            user_history_followers =  get_followers_count(user_id, registration_date, followers)
+
+            # Append new row to the table
+            new_data.add([
+                repo_name, repo_id, user_id, user_age, registration_date.date(),
+                user_own_repos, 
+                user_watch_repos, 
+                user_contribute_repos, user_history_commits, 
+                user_history_pull_requests, user_history_issues, user_history_followers, 
+                ltc_1, ltc_2, ltc_3
+            ])
 
     print(f"Data saved to {csv_path}")
 
-def process_repo(repo_num, repo, table_directory, df_watchers, df_issues, df_followers, df_commits):
+def process_repo(repo_num, repo, table_directory, user_watchers, df_issues, df_followers, df_commits):
     repo_name = repo["name"]
     contributor_file = f"../FilteredContributors/contributors_{repo_name}.json"
     csv_path = f"{table_directory}/dp_{repo_name}.csv"
@@ -193,48 +170,67 @@ def process_repo(repo_num, repo, table_directory, df_watchers, df_issues, df_fol
             contributor_list = json.load(f)
 
         create_developer_profile(repo_num, repo, contributor_list, csv_path,
-                                 df_watchers, df_issues, df_followers, df_commits)
+                                 user_watchers, df_issues, df_followers, df_commits)
     except Exception as e:
         print(f"[Error] Repo {repo_name}: {e}")
 
-def main():
-    table_directory = "../Tables/DeveloperProfiles"
-    os.makedirs(table_directory, exist_ok=True)
+def contributor_ids(repo_list):
+    """
+    Function that returns the ids of the filtered contributors of the repositories.
+    """
+    user_ids = set()
+    for repo in repo_list:
+        contributor_file = f"../FilteredContributors/contributors_{repo['name']}.json"
+        if os.path.isfile(contributor_file):
+            with open(contributor_file, 'r', encoding='utf-8') as f:
+                user_ids.update(contributor["id"] for contributor in json.load(f))
+    return user_ids
+
+def load_ghtorrent(repo_list):
+    """
+    Function that loads the GHTorrent rows of the
+    contributors of the repositories in repo_list.
+    """
+    user_ids = contributor_ids(repo_list)
+    return {
+        "watchers": parquet_store.load_ghtorrent("watchers", "user_id", user_ids),
+        "issues": parquet_store.load_ghtorrent("issues", "reporter_id", user_ids),
+        "followers": parquet_store.load_ghtorrent("follower", "user_id", user_ids),
+        "commits": parquet_store.load_ghtorrent("commits", "author_id", user_ids),
+    }
+
+def enable_stores():
+    """
+    Function that turns on the response cache and user store of this process.
+    """
+    github_api.enable_cache()
+    user_store.enable_store()
+
+def build_state(frames):
+    """
+    Function that prepares the arguments of process_repo()
+    once for all repositories.
+    """
+    user_watchers = GroupedTimestamps(frames["watchers"], "user_id")  # sorted watch dates per user
+    return TABLE_DIRECTORY, user_watchers, frames["issues"], frames["followers"], frames["commits"]
 
-    # Read all needed CSVs and parse datetimes
-    df_watchers = pl.read_csv("../GHTorrent Data/watchers_filtered.csv").with_columns(
-        pl.col("created_at").str.strptime(pl.Datetime, strict=False).dt.replace_time_zone("UTC")
-    )
-    df_issues = pl.read_csv("../GHTorrent Data/issues_filtered.csv").with_columns(
-        pl.col("created_at").str.strptime(pl.Datetime, strict=False).dt.replace_time_zone("UTC")
-    )
-    df_followers = pl.read_csv("../GHTorrent Data/follower_filtered.csv").with_columns(
-        pl.col("created_at").str.strptime(pl.Datetime, strict=False).dt.replace_time_zone("UTC")
-    )
-    
-    df_followers = pl.read_csv("../GHTorrent Data/follower_filtered.csv").with_columns(
-        pl.col("created_at").str.strptime(pl.Datetime, strict=False).dt.replace_time_zone("UTC")
-    )
-    df_commits = pl.read_csv("../GHTorrent Data/commits_filtered.csv").with_columns(
-        pl.col("created_at").str.strptime(pl.Datetime, strict=False).dt.replace_time_zone("UTC")
-    )
-    # print(df_commits.head())
+def main(use_processes=False, max_workers=3):  # You can increase max_workers
+    enable_stores()
+    os.makedirs(TABLE_DIRECTORY, exist_ok=True)
 
     # Load repo list
     with open('../filteredRepos.json', 'r', encoding='utf-8') as f:
-        repo_list = json.load(f)
-
-    # Run processing in parallel using threads
-    with ThreadPoolExecutor(max_workers=3) as executor:  # You can increase this number
-        futures = [
-            executor.submit(process_repo, i, repo, table_directory,
-                            df_watchers, df_issues, df_followers, df_commits)
-            for i, repo in enumerate(repo_list[:121])
-            # 121
-        ]
-        for future in futures:
-            future.result()  # Raise errors if any
+        repo_list = json.load(f)[:121]
+
+    # Load the GHTorrent rows of their contributors
+    frames = load_ghtorrent(repo_list)
+
+    # Run processing in parallel using threads or processes, most contributors first
+    parallel.run_repos(process_repo, repo_list, frames, build_state, max_workers, use_processes,
+                       size=parallel.contributor_count, setup=enable_stores)
+    # In process mode the statistics of the workers are not included
+    github_api.report()
+    user_store.report()
 
 if __name__ == "__main__":
-    # remaining, reset_time = check_rate_limit()
-    main()      
\ No newline at end of file
+    main(use_processes="--processes" in sys.argv)      
\ No newline at end of file
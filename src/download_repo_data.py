@@ -1,39 +1,49 @@
 """ This code downloads repository data from Github API.
 """
-from dotenv import load_dotenv
-import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date, timedelta
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+import github_api
+import graphql_fetch
+import dataset_io
+import aiohttp
+import asyncio
+import threading
 import json
 import time
+import math
 import re
 import os
 
-load_dotenv()
+MAX_RETRIES = 6
+MAX_PAGES_PER_REPO = 8  # concurrent page requests for a single repository
+MAX_PAGES_TOTAL = 32    # concurrent page requests across all repositories
+MAX_REPOS = 4           # repositories downloaded at the same time
+SYNC_STATE_FILE = "sync_state.json"  # high-water marks of incremental syncs
+MERGE_PAGE_SIZE = 1000  # existing records rewritten at a time by a sync
+RUN_STATE_FILE = "../Datasets/download_run.json"  # data types completed by the current run
+RUN_STATE_LOCK = threading.Lock()
+SEARCH_URL = "https://api.github.com/search/repositories"
+SEARCH_LIMIT = 1000             # results the Search API returns for a single query
+SEARCH_WORKERS = 4              # concurrent search requests, paced by the search rate limit
+FIRST_CREATED = date(2007, 10, 1)  # no repository was created before this date
+DATA_TYPES = [
+    "contributors", "commits", "commit_comments", "issues", "issue_comments",
+    "issue_events", "pull_requests", "pull_request_comments"
+]
 
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN3")
-HEADERS = {
-    "Authorization": f"token {GITHUB_TOKEN}"
-}
-
-def check_rate_limit():
-    """
-    Function that checks GitHub API limit and remaining number of responses
-    """
-    response = requests.get("https://api.github.com/rate_limit", headers=HEADERS)
-    if response.status_code == 200:
-        rate_limit = response.json()
-        remaining = rate_limit["rate"]["remaining"]
-        reset_time = rate_limit["rate"]["reset"]
-        # print(f"Remaining Requests: {remaining}, Reset Time: {time.ctime(reset_time)}")
-        return remaining, reset_time
-    return 0, 0
-
-def get_popular_repositories(min_stars=3000, per_page=100, max_repos=1000):
+def get_popular_repositories(min_stars=3000, per_page=100, max_repos=1000, partitioned=False, split_dates=False):
     """
     Function that fetches the top 1000 repositories 
     with more than 3000 stars using the GitHub API.
+    With partitioned=True every repository above min_stars is found,
+    see discover_repositories(), and max_repos=None removes the cap.
     """
+    if partitioned:
+        return discover_repositories(min_stars, max_repos, split_dates)
+
     query = f"stars:>{min_stars} is:public"
-    url = "https://api.github.com/search/repositories"
+    url = SEARCH_URL
     all_repos = []
     page = 1
     while len(all_repos) < max_repos:
@@ -44,13 +54,7 @@ def get_popular_repositories(min_stars=3000, per_page=100, max_repos=1000):
             "per_page": per_page,
             "page": page
         }
-        remaining, reset_time = check_rate_limit()
-        if remaining == 0:
-            wait_time = max(0, reset_time - time.time())
-            print(f"\t\tRate limit exceeded! Waiting {wait_time:.2f} seconds before retrying...")
-            time.sleep(wait_time + 1)
-            continue
-        response = requests.get(url, headers=HEADERS, params=params)
+        response = github_api.search(url, params=params)
         if response.status_code != 200:
             print("Error retrieving repositories!")
             print(f"Response: {response.text}") 
@@ -62,30 +66,147 @@ def get_popular_repositories(min_stars=3000, per_page=100, max_repos=1000):
         page += 1
     return all_repos
 
+def search_query(bucket):
+    """
+    Function that returns the search query of a bucket,
+    a (min stars, max stars, first created, last created) tuple.
+    The range is open ended while the max stars are unknown.
+    """
+    low, high, start, end = bucket
+    query = f"stars:>={low} is:public" if high is None else f"stars:{low}..{high} is:public"
+    if start is not None:
+        query += f" created:{start.isoformat()}..{end.isoformat()}"
+    return query
+
+def search_page(bucket, page, per_page=100):
+    """
+    Function that fetches one page of repositories in a bucket.
+    Returns the decoded response, or None if every retry failed.
+    """
+    params = {"q": search_query(bucket), "sort": "stars", "order": "desc", "per_page": per_page, "page": page}
+    retries = 1
+    while retries <= MAX_RETRIES:
+        response = github_api.search(SEARCH_URL, params=params)
+        if response.status_code == 200:
+            return response.json()
+        print(f"Error searching {params['q']} page {page}. Status Code: {response.status_code}. Retrying {retries}/{MAX_RETRIES}...")
+        time.sleep(5)  # Wait before retrying
+        retries += 1
+    print(f"Error searching {params['q']} page {page}. Status Code: {response.status_code}")
+    return None
+
+def split_bucket(bucket, split_dates=False):
+    """
+    Function that splits a bucket in two. Star ranges are split at
+    their geometric middle since stars are heavy tailed; a single star
+    count is split by creation date when split_dates is set.
+    An open ended star range (high is None) is split after twice low.
+    Returns an empty list if the bucket cannot be split.
+    """
+    low, high, start, end = bucket
+    if high is None:
+        middle = max(2 * low, 1)
+        return [(low, middle, start, end), (middle + 1, None, start, end)]
+    if low < high:
+        middle = min(max(int(math.sqrt(max(low, 1) * high)), low), high - 1)
+        return [(low, middle, start, end), (middle + 1, high, start, end)]
+    if split_dates:
+        start = start or FIRST_CREATED
+        end = end or date.today()
+        if start < end:
+            middle = start + (end - start) // 2
+            return [(low, high, start, middle), (low, high, middle + timedelta(days=1), end)]
+    return []
+
+def discover_repositories(min_stars=3000, max_repos=None, split_dates=False, per_page=100, max_workers=SEARCH_WORKERS):
+    """
+    Function that finds the public repositories with more than min_stars
+    stars beyond the Search API limit of 1000 results per query.
+    The star range, and optionally the creation date, is split into
+    buckets until each fits under the limit. Buckets and their pages are
+    searched concurrently, repositories are de-duplicated by id and
+    filter_github_repositories' criteria are applied as each page arrives.
+    Returns the eligible repositories sorted by stars.
+    """
+    lock = threading.Lock()
+    seen = set()
+    eligible = []
+
+    def accept(repos):
+        with lock:
+            for repo in repos:
+                if repo["id"] not in seen:
+                    seen.add(repo["id"])
+                    if is_eligible(repo):
+                        eligible.append(repo)
+
+    def search_bucket(bucket):
+        """
+        Function that fetches the first page of a bucket and returns the
+        follow-up tasks: its sub-buckets if it is over the limit, else its other pages.
+        """
+        data = search_page(bucket, 1, per_page)
+        if data is None:
+            return []
+        total = data["total_count"]
+        if total > SEARCH_LIMIT:
+            low, high, start, end = bucket
+            if high is None and data["items"]:
+                bucket = (low, data["items"][0]["stargazers_count"], start, end)
+            buckets = split_bucket(bucket, split_dates)
+            if buckets:
+                return [(search_bucket, sub_bucket) for sub_bucket in buckets]
+            print(f"\t{search_query(bucket)} has {total} results, only the first {SEARCH_LIMIT} can be fetched.")
+        accept(data["items"])
+        last_page = math.ceil(min(total, SEARCH_LIMIT) / per_page)
+        return [(search_bucket_page, bucket, page) for page in range(2, last_page + 1)]
+
+    def search_bucket_page(bucket, page):
+        data = search_page(bucket, page, per_page)
+        if data is not None:
+            accept(data["items"])
+        return []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(search_bucket, (min_stars + 1, None, None, None))}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for task in future.result():
+                    pending.add(executor.submit(*task))
+            print(f"\tFound {len(seen)} repositories, {len(eligible)} eligible...")
+
+    eligible.sort(key=lambda repo: repo["stargazers_count"], reverse=True)
+    return eligible[:max_repos] if max_repos else eligible
+
+def is_eligible(repo):
+    """
+    Function that checks a repository against the
+    criteria of filter_github_repositories.
+    """
+    return bool(
+        repo.get("language")
+        and repo.get("has_issues", True)
+        and not repo.get("fork", False)
+        and not repo.get("archived", False)
+    )
+
 def filter_github_repositories(repo_data):
     """
     Function that filters repositories based 
     on predefined criteria.
     """
-    filtered_repos = [
-        repo for repo in repo_data 
-        if repo.get("language") 
-        and repo.get("has_issues", True) 
-        and not repo.get("fork", False) 
-        and not repo.get("archived", False)
-    ]
+    filtered_repos = [repo for repo in repo_data if is_eligible(repo)]
     with open("../filteredRepos.json", 'w', encoding='utf-8') as file:
         json.dump(filtered_repos, file, indent=4)
     print(f"Filtered data saved to filteredRepos.json with {len(filtered_repos)} repositories.")
 
-def read_repo_data(repo, num):
+def get_repo_urls(repo):
     """
-    Function that extracts and saves metadata 
-    and URLs of interest for a given repository.
+    Function that returns the URLs of interest 
+    for a given repository keyed by data type.
     """
-    repo_name = repo["name"]
-    owner = repo["owner"]["login"]
-    repo_urls = {
+    return {
         "contributors": repo["contributors_url"],
         "commits": repo["commits_url"],
         "commit_comments": repo["comments_url"],
@@ -93,72 +214,535 @@ def read_repo_data(repo, num):
         "issue_comments": repo["issue_comment_url"],
         "issue_events": repo["issue_events_url"],
         "pull_requests": repo["pulls_url"].replace("{/number}", "?state=all"),
-        "pull_request_comments": f"https://api.github.com/repos/{owner}/{repo_name}/pulls/comments",
+        "pull_request_comments": f"{repo['url']}/pulls/comments",
     }
+
+def read_repo_data(repo, num, parallel=False, run_state=None, use_graphql=False):
+    """
+    Function that extracts and saves metadata 
+    and URLs of interest for a given repository.
+    With parallel=True the data types are fetched concurrently.
+    With use_graphql=True issues, pull requests, their comments and
+    events are fetched together with the GraphQL API.
+    Data types already completed in the current run are skipped.
+    """
+    repo_name = repo["name"]
+    repo_urls = get_repo_urls(repo)
+    if run_state is not None:
+        completed = run_state["completed"].get(repo_name, [])
+        repo_urls = {data_type: url for data_type, url in repo_urls.items() if data_type not in completed}
+        if not repo_urls:
+            print(f"Data for {num}: {repo_name} already downloaded in this run, skipping.")
+            return
     
     repo_directory = f"../Datasets/{repo_name}/"
     
     os.makedirs(repo_directory, exist_ok=True)
 
+    def download(data_type, url):
+        if save_to_JSON(data_type, url, repo_name, repo_directory) and run_state is not None:
+            mark_complete(run_state, repo_name, data_type)
+
     print(f"Retrieving data for {num}: {repo_name}...")
-    for data_type, url in repo_urls.items():
-        save_to_JSON(data_type, url, repo_name, repo_directory)
+    graphql_types = [data_type for data_type in graphql_fetch.GRAPHQL_TYPES if data_type in repo_urls]
+    if use_graphql and graphql_types:
+        if graphql_fetch.save_to_JSON_graphql(repo, repo_directory) and run_state is not None:
+            for data_type in graphql_types:
+                mark_complete(run_state, repo_name, data_type)
+        repo_urls = {data_type: url for data_type, url in repo_urls.items() if data_type not in graphql_types}
+        if not repo_urls:
+            return
+
+    if parallel:
+        with ThreadPoolExecutor(max_workers=len(repo_urls)) as executor:
+            futures = [
+                executor.submit(download, data_type, url)
+                for data_type, url in repo_urls.items()
+            ]
+            for future in futures:
+                future.result()
+    else:
+        for data_type, url in repo_urls.items():
+            download(data_type, url)
+
+def load_run_state(repo_list):
+    """
+    Function that loads the state of the current download run,
+    or starts a new run if the previous one finished.
+    """
+    if os.path.exists(RUN_STATE_FILE):
+        with open(RUN_STATE_FILE, 'r', encoding='utf-8') as file:
+            run_state = json.load(file)
+        print(f"Resuming download run started {time.ctime(run_state['started'])}.")
+    else:
+        run_state = {"started": time.time(), "completed": {}}
+    run_state["total"] = len(repo_list) * len(DATA_TYPES)
+    return run_state
+
+def mark_complete(run_state, repo_name, data_type):
+    """
+    Function that records a finished data type in the run state.
+    """
+    with RUN_STATE_LOCK:
+        run_state["completed"].setdefault(repo_name, []).append(data_type)
+        os.makedirs(os.path.dirname(RUN_STATE_FILE), exist_ok=True)
+        temp_path = RUN_STATE_FILE + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(run_state, file)
+        os.replace(temp_path, RUN_STATE_FILE)
+
+def finish_run(run_state):
+    """
+    Function that ends the run once every data type of every repository
+    is complete, so the next run starts from scratch.
+    """
+    completed = sum(len(data_types) for data_types in run_state["completed"].values())
+    if completed >= run_state["total"]:
+        if os.path.exists(RUN_STATE_FILE):
+            os.remove(RUN_STATE_FILE)
+        print("Download run complete.")
+    else:
+        print(f"Download run incomplete: {completed}/{run_state['total']} data types saved. Run again to resume.")
+
+def open_writer(data_type, url, repo_name, repo_directory):
+    """
+    Function that opens the dataset writer of a download,
+    resuming from its checkpoint if a previous attempt was interrupted.
+    Returns the writer and the URL to continue from.
+    """
+    checkpoint = dataset_io.load_checkpoint(repo_name, data_type, repo_directory)
+    if checkpoint and checkpoint["pages"] > 0 and checkpoint["next_url"]:
+        print(f"\tResuming {data_type} for {repo_name} after page {checkpoint['pages']} "
+              f"({checkpoint['records']} records)...")
+        return dataset_io.DatasetWriter(repo_name, data_type, repo_directory, checkpoint=checkpoint), checkpoint["next_url"]
+    return dataset_io.DatasetWriter(repo_name, data_type, repo_directory, next_url=url), url
+
+def fetch_page(url, data_type, repo_name, params=None, revalidate=False):
+    """
+    Function that fetches a single page of a GitHub API URL with retries.
+    With revalidate a cached page is always checked with GitHub first.
+    Returns the response, or None if every retry failed.
+    """
+    retries = 1
+    while retries <= MAX_RETRIES:
+        response = github_api.get(url, params=params, revalidate=revalidate)
+        if response.status_code == 200:
+            return response
+        print(f"Error collecting {data_type} for {repo_name}. Status Code: {response.status_code}. Retrying {retries}/{MAX_RETRIES}...")
+        time.sleep(5)  # Wait before retrying
+        retries += 1
+    print(f"Error collecting {data_type} for {repo_name}. Status Code: {response.status_code}")
+    return None
 
 def save_to_JSON(data_type, url, repo_name, repo_directory):
     """
-    Function that fetches data from a GitHub API URL and saves it as JSON.
+    Function that fetches data from a GitHub API URL and streams 
+    each page to the dataset file as soon as it arrives.
+    A checkpoint is kept after every page; returns True once complete.
     """
-    collected_data = []
     url = re.sub(r"\{.*?\}", "", url) 
-    max_retries = 6
     
     print(f"\tFetching {data_type} data for {repo_name}...")
+    writer, url = open_writer(data_type, url, repo_name, repo_directory)
+    with writer:
+        while url:
+            response = fetch_page(url, data_type, repo_name)
+            if response is None:
+                writer.abort()  # keep the checkpoint, the next run resumes here
+                print(f"\tStopped {data_type} for {repo_name} after {writer.count} records, saved checkpoint.")
+                return False
+            
+            url = response.links.get('next', {}).get('url')
+            writer.write_page(response.json(), url)
+       
+    print(f"\tSaved {writer.count} records for {data_type}.")
+    return True
+
+def get_field(record, path):
+    """
+    Function that returns a nested field of a record or None.
+    """
+    for key in path:
+        record = (record or {}).get(key)
+    return record
+
+def get_record_key(record):
+    """
+    Function that returns the identity of a record,
+    commits are identified by sha and everything else by id,
+    events saved by the GraphQL download only have a node_id.
+    """
+    return record.get("sha") or record.get("id") or record.get("node_id")
+
+def load_sync_state(directory):
+    """
+    Function that loads the high-water marks of a repository.
+    """
+    state_path = os.path.join(directory, SYNC_STATE_FILE)
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def save_sync_state(directory, state):
+    """
+    Function that saves the high-water marks of a repository.
+    """
+    with open(os.path.join(directory, SYNC_STATE_FILE), 'w', encoding='utf-8') as file:
+        json.dump(state, file, indent=4)
+
+def fetch_since(data_type, url, repo_name, params, date_path, watermark):
+    """
+    Function that fetches the records changed after the watermark
+    from an endpoint supporting the since parameter. Pages are
+    revalidated, a cached page could hide records past the watermark.
+    """
+    collected_data = []
+    params = {**params, "since": watermark}
     while url:
-        remaining, reset_time = check_rate_limit()
-        if remaining == 0:
-            wait_time = max(0, reset_time - time.time())
-            print(f"\t\tRate limit exceeded! Waiting {wait_time:.2f} seconds before retrying...")
-            time.sleep(wait_time + 1)
-            continue
-        
-        retries = 1
-        while retries <= max_retries:
-            response = requests.get(url, headers=HEADERS)
-            if response.status_code == 200:
-                break  # Success, exit retry loop
-            print(f"Error collecting {data_type} for {repo_name}. Status Code: {response.status_code}. Retrying {retries}/{max_retries}...")
-            time.sleep(5)  # Wait before retrying
-            retries += 1
+        response = fetch_page(url, data_type, repo_name, params, revalidate=True)
+        if response is None:
+            return None
+        collected_data.extend(response.json())
+        url = response.links.get('next', {}).get('url')
+        params = None  # next links already carry the query
+    return collected_data
 
-        if response.status_code != 200:
-            print(f"Error collecting {data_type} for {repo_name}. Status Code: {response.status_code}")
-            break
-        
+def fetch_newest_first(data_type, url, repo_name, params, date_path, watermark):
+    """
+    Function that walks an endpoint sorted newest first 
+    and stops at the first page reaching the watermark.
+    """
+    collected_data = []
+    while url:
+        response = fetch_page(url, data_type, repo_name, params, revalidate=True)
+        if response is None:
+            return None
         data = response.json()
         collected_data.extend(data)
+        if any((get_field(record, date_path) or "") <= watermark for record in data):
+            break
         url = response.links.get('next', {}).get('url')
-       
-    save_progress(repo_directory, repo_name, data_type, collected_data)
-    print(f"\tSaved {len(collected_data)} records for {data_type}.")
+        params = None
+    return collected_data
+
+def fetch_oldest_first(data_type, url, repo_name, params, date_path, watermark):
+    """
+    Function that walks an endpoint sorted oldest first backwards
+    from its last page and stops at the first page reaching the watermark.
+    """
+    response = fetch_page(url, data_type, repo_name, params, revalidate=True)
+    if response is None:
+        return None
+    last_url = response.links.get('last', {}).get('url')
+    if not last_url:
+        return response.json()
+    collected_data = []
+    url = last_url
+    while url:
+        response = fetch_page(url, data_type, repo_name, revalidate=True)
+        if response is None:
+            return None
+        data = response.json()
+        collected_data = data + collected_data
+        if any((get_field(record, date_path) or "") <= watermark for record in data):
+            break
+        url = response.links.get('prev', {}).get('url')
+    return collected_data
+
+# How each data type is synced incrementally: (date field, fetch function, extra parameters)
+# contributors has no dates and is always downloaded in full
+SYNC_STRATEGIES = {
+    "commits": (("commit", "author", "date"), fetch_since, {}),
+    "issues": (("updated_at",), fetch_since, {}),
+    "issue_comments": (("updated_at",), fetch_since, {}),
+    "pull_request_comments": (("updated_at",), fetch_since, {}),
+    "pull_requests": (("updated_at",), fetch_newest_first, {"sort": "updated", "direction": "desc"}),
+    "issue_events": (("created_at",), fetch_newest_first, {}),
+    "commit_comments": (("created_at",), fetch_oldest_first, {}),
+}
+
+def get_watermark(data, date_path):
+    """
+    Function that returns the newest date of a list of records.
+    """
+    return max((get_field(record, date_path) or "" for record in data), default="")
+
+def merge_dataset(repo_name, data_type, repo_directory, new_records, append):
+    """
+    Function that rewrites a dataset with the new records before (or
+    after, with append) the existing ones, streaming the existing records
+    page by page and dropping those replaced by a new record.
+    The merge is written to a .partial file without a checkpoint and
+    renamed over the dataset at the end, so a crash leaves the previous
+    dataset complete and the next sync merges again.
+    """
+    new_keys = {get_record_key(record) for record in new_records}
+    existing_path = None
+    if dataset_io.dataset_exists(repo_name, data_type, repo_directory):
+        existing_path = dataset_io.find_dataset(repo_name, data_type, repo_directory)
+    writer = dataset_io.DatasetWriter(repo_name, data_type, repo_directory, resumable=False)
+    try:
+        if not append:
+            writer.write_page(new_records)
+        if existing_path:
+            page = []
+            for record in dataset_io.iter_file(existing_path):
+                if get_record_key(record) not in new_keys:
+                    page.append(record)
+                if len(page) >= MERGE_PAGE_SIZE:
+                    writer.write_page(page)
+                    page = []
+            if page:
+                writer.write_page(page)
+        if append:
+            writer.write_page(new_records)
+    except BaseException:
+        writer.discard()  # the existing dataset is left as it was
+        raise
+    writer.close()
+
+def sync_to_JSON(data_type, url, repo_name, repo_directory, state):
+    """
+    Function that fetches only the records added or updated since the 
+    last sync and merges them into the existing JSON without duplicates.
+    Falls back to a full download when there is nothing to merge into.
+    """
+    if data_type not in SYNC_STRATEGIES:
+        save_to_JSON(data_type, url, repo_name, repo_directory)
+        return
+    date_path, fetch, params = SYNC_STRATEGIES[data_type]
+
+    if dataset_io.load_checkpoint(repo_name, data_type, repo_directory):
+        # Finish the interrupted full download before syncing on top of it
+        if save_to_JSON(data_type, url, repo_name, repo_directory):
+            state[data_type] = get_watermark(dataset_io.iter_dataset(repo_name, data_type, repo_directory), date_path)
+        return
+
+    watermark = state.get(data_type)
+    if not watermark and dataset_io.dataset_exists(repo_name, data_type, repo_directory):
+        watermark = get_watermark(dataset_io.iter_dataset(repo_name, data_type, repo_directory), date_path)
+    if not watermark:
+        if not save_to_JSON(data_type, url, repo_name, repo_directory):
+            return
+        state[data_type] = get_watermark(dataset_io.iter_dataset(repo_name, data_type, repo_directory), date_path)
+        return
+
+    print(f"\tSyncing {data_type} data for {repo_name} since {watermark}...")
+    new_data = fetch(data_type, re.sub(r"\{.*?\}", "", url), repo_name, params, date_path, watermark)
+    if new_data is None:
+        return  # keep the existing data and watermark, retry on the next sync
+
+    new_records = {get_record_key(record): record for record in new_data}
+    merge_dataset(repo_name, data_type, repo_directory, list(new_records.values()), fetch is fetch_oldest_first)
+    state[data_type] = max(watermark, get_watermark(new_data, date_path))
+    print(f"\tMerged {len(new_records)} new or updated records for {data_type}.")
+
+def sync_repo_data(repo, num):
+    """
+    Function that brings the saved data of a 
+    repository up to date incrementally.
+    """
+    repo_name = repo["name"]
+    repo_directory = f"../Datasets/{repo_name}/"
+    os.makedirs(repo_directory, exist_ok=True)
+    state = load_sync_state(repo_directory)
+
+    print(f"Syncing data for {num}: {repo_name}...")
+    for data_type, url in get_repo_urls(repo).items():
+        sync_to_JSON(data_type, url, repo_name, repo_directory, state)
+        save_sync_state(repo_directory, state)
+
+def page_url(url, page):
+    """
+    Function that returns a copy of a paginated 
+    URL pointing at the given page number.
+    """
+    parts = urlparse(url)
+    query = parse_qs(parts.query)
+    query["page"] = [str(page)]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+def get_page(url):
+    """
+    Function that reads the page number of a paginated URL.
+    """
+    page = parse_qs(urlparse(str(url)).query).get("page")
+    return int(page[0]) if page else 1
+
+def get_last_page(response):
+    """
+    Function that reads the last page number 
+    from the Link header of a response.
+    """
+    last_url = response.links.get("last", {}).get("url")
+    if not last_url:
+        return None
+    return get_page(last_url)
+
+async def fetch_page_async(session, url, data_type, repo_name, repo_semaphore, global_semaphore):
+    """
+    Function that fetches a single page of a GitHub API URL.
+    Returns the decoded data and the response, or (None, response) on failure.
+    """
+    cache = github_api.CACHE
+    key = github_api.cache_key(url)  # the key github_api.get uses, so both fetchers share entries
+    entry = cache.lookup(key) if cache else None
+    if entry and cache.is_fresh(entry):
+        cache.record("hits")
+        response = cache.to_response(key, entry)
+        return response.json(), response
+    conditional_headers = cache.conditional_headers(entry) if entry else None
+
+    retries = 1
+    while True:
+        token = github_api.POOL.acquire()
+        await github_api.POOL.governors[token].wait_async()
+        async with repo_semaphore, global_semaphore:
+            async with session.get(url, headers=github_api.POOL.headers(token, conditional_headers)) as response:
+                limited = github_api.POOL.update(token, response.headers, response.status)
+                if entry and response.status == 304:
+                    cache.record("revalidated")
+                    cache.revalidate(key)
+                    response = cache.to_response(key, entry)
+                    return response.json(), response
+                if response.status == 200:
+                    body = await response.read()
+                    if cache:
+                        cache.record("misses")
+                        cache.store(key, response.headers, body)
+                    return json.loads(body), response
+                status = response.status
+
+        if limited:
+            continue
+        if retries > MAX_RETRIES:
+            print(f"Error collecting {data_type} for {repo_name}. Status Code: {status}")
+            return None, response
+        print(f"Error collecting {data_type} for {repo_name}. Status Code: {status}. Retrying {retries}/{MAX_RETRIES}...")
+        await asyncio.sleep(5)  # Wait before retrying
+        retries += 1
 
-def save_progress(directory, repo_name, data_type, data):
+async def save_to_JSON_async(session, data_type, url, repo_name, repo_directory, repo_semaphore, global_semaphore):
     """
-    Function that saves the fetched data to a JSON file.
+    Function that fetches every page of a GitHub API URL concurrently
+    and streams the records to the dataset file in page order.
+    The page count is read from the Link header of the first response;
+    endpoints without a last link are walked page by page.
+    A checkpoint is kept after every page; returns True once complete.
     """
-    file_path = os.path.join(directory, f"{data_type}_{repo_name}.json")
-    with open(file_path, 'w', encoding='utf-8') as file:
-        json.dump(data, file, indent=4) 
+    url = re.sub(r"\{.*?\}", "", url)
+
+    print(f"\tFetching {data_type} data for {repo_name}...")
+    writer, url = open_writer(data_type, url, repo_name, repo_directory)
+    with writer:
+        if url:
+            first_page = get_page(url)
+            data, response = await fetch_page_async(session, url, data_type, repo_name, repo_semaphore, global_semaphore)
+            if data is None:
+                writer.abort()
+                print(f"\tStopped {data_type} for {repo_name} after {writer.count} records, saved checkpoint.")
+                return False
+
+            last_page = get_last_page(response)
+            if last_page:
+                base_url = str(response.links["last"]["url"])
+                writer.write_page(data, page_url(base_url, first_page + 1) if first_page < last_page else None)
+                tasks = [
+                    asyncio.ensure_future(fetch_page_async(session, page_url(base_url, page), data_type, repo_name,
+                                                           repo_semaphore, global_semaphore))
+                    for page in range(first_page + 1, last_page + 1)
+                ]
+                # Pages are written in order as soon as they and every page before them arrive
+                for page, task in enumerate(tasks, start=first_page + 1):
+                    data, _ = await task
+                    if data is None:
+                        for pending in tasks:
+                            pending.cancel()
+                        writer.abort()
+                        print(f"\tStopped {data_type} for {repo_name} at page {page}, saved checkpoint.")
+                        return False
+                    writer.write_page(data, page_url(base_url, page + 1) if page < last_page else None)
+            else:
+                next_url = response.links.get("next", {}).get("url")
+                writer.write_page(data, next_url and str(next_url))
+                while next_url:
+                    data, response = await fetch_page_async(session, str(next_url), data_type, repo_name,
+                                                            repo_semaphore, global_semaphore)
+                    if data is None:
+                        writer.abort()
+                        print(f"\tStopped {data_type} for {repo_name} after {writer.count} records, saved checkpoint.")
+                        return False
+                    next_url = response.links.get("next", {}).get("url")
+                    writer.write_page(data, next_url and str(next_url))
+
+    print(f"\tSaved {writer.count} records for {data_type}.")
+    return True
+
+async def read_repo_data_async(session, repo, num, global_semaphore, max_pages=MAX_PAGES_PER_REPO, run_state=None):
+    """
+    Function that fetches all data types of a 
+    repository concurrently.
+    Data types already completed in the current run are skipped.
+    """
+    repo_name = repo["name"]
+    repo_urls = get_repo_urls(repo)
+    if run_state is not None:
+        completed = run_state["completed"].get(repo_name, [])
+        repo_urls = {data_type: url for data_type, url in repo_urls.items() if data_type not in completed}
+        if not repo_urls:
+            print(f"Data for {num}: {repo_name} already downloaded in this run, skipping.")
+            return
+    repo_directory = f"../Datasets/{repo_name}/"
+    os.makedirs(repo_directory, exist_ok=True)
+    repo_semaphore = asyncio.Semaphore(max_pages)
+
+    async def download(data_type, url):
+        if await save_to_JSON_async(session, data_type, url, repo_name, repo_directory,
+                                    repo_semaphore, global_semaphore) and run_state is not None:
+            mark_complete(run_state, repo_name, data_type)
+
+    print(f"Retrieving data for {num}: {repo_name}...")
+    await asyncio.gather(*[download(data_type, url) for data_type, url in repo_urls.items()])
+
+async def download_repos_async(repo_list, max_repos=MAX_REPOS, max_pages_per_repo=MAX_PAGES_PER_REPO,
+                               max_pages_total=MAX_PAGES_TOTAL, run_state=None):
+    """
+    Function that downloads the data of several 
+    repositories concurrently with bounded concurrency.
+    """
+    global_semaphore = asyncio.Semaphore(max_pages_total)
+    repo_slots = asyncio.Semaphore(max_repos)
+
+    async def run(num, repo):
+        async with repo_slots:
+            await read_repo_data_async(session, repo, num, global_semaphore, max_pages_per_repo, run_state)
+
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*[run(i, repo) for i, repo in enumerate(repo_list)])
 
-def main():
+def main(use_async=True, incremental=False, use_graphql=False):
+    github_api.enable_cache()
     # popularRepos = get_popular_repositories() # get top repos
+    # popularRepos = get_popular_repositories(partitioned=True, max_repos=None) # get every repo above the star count
     # filter_github_repositories(popularRepos)  # filter github repos
     
     with open('../filteredRepos.json', 'r', encoding='utf-8') as file:
         filtered_repos = json.load(file)
         
-    for i, repo in enumerate(filtered_repos):
-        read_repo_data(repo, i)
+    if incremental:
+        for i, repo in enumerate(filtered_repos):
+            sync_repo_data(repo, i)
+    else:
+        run_state = load_run_state(filtered_repos)
+        if use_async and not use_graphql:
+            asyncio.run(download_repos_async(filtered_repos, run_state=run_state))
+        else:
+            for i, repo in enumerate(filtered_repos):
+                read_repo_data(repo, i, run_state=run_state, use_graphql=use_graphql)
+        finish_run(run_state)
+    github_api.report()
+    graphql_fetch.report_cost()
 
 if __name__ == "__main__":
-    # remaining, reset_time = check_rate_limit()
-    main()
+    main()
\ No newline at end of file
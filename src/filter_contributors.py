@@ -1,50 +1,40 @@
 """ This code filters contributors based on many criteia.
 """
-from dateutil.relativedelta import relativedelta
-from dotenv import load_dotenv
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import github_api
+import user_store
+import dataset_io
+import parquet_store
 import json
 import time
 import os
 import pandas as pd
+import polars as pl
 
-load_dotenv()
-
-GITHUB_TOKEN = os.getenv("GIT_TOKEN3")
-
-HEADERS = {
-    "Authorization": f"token {GITHUB_TOKEN}"
-}
-
-def check_rate_limit():
-    """
-    Function that checks GitHub API limit and remaining number of responses
-    """
-    response = requests.get("https://api.github.com/rate_limit", headers=HEADERS)
-    if response.status_code == 200:
-        rate_limit = response.json()
-        remaining = rate_limit["rate"]["remaining"]
-        reset_time = rate_limit["rate"]["reset"]
-        # print(f"\t\tRemaining Requests: {remaining}, Reset Time: {time.ctime(reset_time)}")
-        return remaining, reset_time
-    return 0, 0
+DAY_MICROSECONDS = 86_400_000_000
+YEAR_LABELS = ["one_year", "two_years", "three_years"]  # commits in each of the first three years
+AS_OF = datetime(2026, 1, 1, tzinfo=timezone.utc)  # end of the observation period (exclusive)
+HORIZONS = ["6mo", "1y", "2y", "3y", "4y", "5y"]  # extra LTC_<horizon> labels, polars duration strings
+PROFILE_WORKERS = 16  # concurrent profile requests, the token pool paces them to the rate budget
 
 # Retrieve user data
 def get_user_data(url, user_id):
     """
     This function retrieves profile data for single user
+    from the user store, fetching it when missing or expired
+    """
+    return user_store.get_user(user_id, "profile", lambda: fetch_user_data(url, user_id))
+
+def fetch_user_data(url, user_id):
+    """
+    This function fetches profile data for single user
     returns the first JSON result
     """
     max_retries = 2
-    remaining, reset_time = check_rate_limit()
-    if remaining == 0:
-        wait_time = max(0, reset_time - time.time())
-        print(f"\t\tRate limit exceeded! Waiting {wait_time:.2f} seconds before retrying...")
-        time.sleep(wait_time + 1)
-        
     retries = 1
     while retries <= max_retries:
-        response = requests.get(url, headers=HEADERS)
+        response = github_api.get(url)
         if response.status_code == 200:
             break  # Success, exit retry loop
         print(f"\tError collecting for {user_id}. Status Code: {response.status_code}. Retrying {retries}/{max_retries}...")
@@ -58,106 +48,134 @@ def get_user_data(url, user_id):
     data = response.json() # get one item 
     return data
 
-def get_first_commit(user_id, commits):
+def label_contributors(profiles, commits, as_of=AS_OF, horizons=HORIZONS, keys=()):
     """
-    Function gets a list of all commit
-    Returns the earliest date
+    Function that computes registration_date, user_age and the activity
+    labels of many contributors in one columnar pass.
+    profiles has the columns id and created_date, commits has author_id 
+    and date. Both can share key columns such as a repository id,
+    which labels the contributors of every repository at once.
+    one_year, two_years and three_years are commits in the yearly windows
+    after registration and LTC is all three. LTC_<horizon> is a commit
+    between registration + horizon and as_of, null until that is observable.
+    Contributors without commits or who joined too late are left out.
     """
-    commit_dates = []
-    for commit in commits:
-        author = commit.get("author")
-        date = commit.get("commit")
-        if not author or not date:
-            continue
-        author = author["id"]
-        date = date["author"]["date"]
-
-        if author == user_id:
-            commit_dates.append(date)
-    return min(commit_dates) if commit_dates else None
-
-def has_commit_in_year(user_id, start_date, end_date, commit_data):
+    keys = list(keys)
+    windows = [f"year_{years}" for years in range(1, len(YEAR_LABELS) + 2)]
+    offsets = [f"horizon_{horizon}" for horizon in horizons]
+    first_commits = commits.group_by(keys + ["author_id"]).agg(pl.col("date").min().alias("registration_date"))
+    labels = (
+        profiles.join(first_commits, left_on=keys + ["id"], right_on=keys + ["author_id"])
+        .with_columns(
+            user_age=(pl.col("registration_date") - pl.col("created_date")).dt.total_microseconds() // DAY_MICROSECONDS
+        )
+        # Filter out contributors who joined less than 3 years before as_of, can't compute if they're a LTC
+        .filter((pl.col("registration_date") < pl.lit(as_of).dt.offset_by("-3y")) & (pl.col("user_age") >= 0))
+        .with_columns(
+            [pl.col("registration_date").dt.offset_by(f"{years}y").alias(window) for years, window in enumerate(windows, start=1)]
+            + [pl.col("registration_date").dt.offset_by(horizon).alias(offset) for horizon, offset in zip(horizons, offsets)]
+        )
+    )
+    # Every label is an any() over the commits of the author in its window
+    activity = (
+        commits.join(labels.select(keys + ["id"] + windows + offsets), left_on=keys + ["author_id"], right_on=keys + ["id"])
+        .group_by(keys + ["author_id"])
+        .agg(
+            [((pl.col("date") >= pl.col(start)) & (pl.col("date") < pl.col(end))).any().alias(label)
+             for start, end, label in zip(windows, windows[1:], YEAR_LABELS)]
+            + [((pl.col("date") >= pl.col(offset)) & (pl.col("date") < as_of)).any().alias(f"LTC_{horizon}")
+               for horizon, offset in zip(horizons, offsets)]
+        )
+    )
+    labels = labels.join(activity, left_on=keys + ["id"], right_on=keys + ["author_id"], how="left")
+    return labels.select(
+        keys + ["id", "registration_date", "user_age"]
+        + [pl.when(pl.col(label)).then(pl.lit("yes")).otherwise(pl.lit("no")).alias(label) for label in YEAR_LABELS]
+        + [pl.when(pl.all_horizontal(YEAR_LABELS)).then(pl.lit("yes")).otherwise(pl.lit("no")).alias("LTC")]
+        + [pl.when(pl.col(offset) >= as_of).then(None)
+           .when(pl.col(f"LTC_{horizon}")).then(pl.lit("yes")).otherwise(pl.lit("no")).alias(f"LTC_{horizon}")
+           for horizon, offset in zip(horizons, offsets)]
+    )
+
+def apply_labels(profiled, repo_commits, as_of=AS_OF, horizons=HORIZONS):
     """
-    Function finds instances of commits in first three years of contribution 
+    Function that labels (contributor, created_date) pairs and 
+    returns the updated contributors that could be labelled.
     """
-    for commit in commit_data:
-        author = commit.get("author")
-        if author and author.get("id") == user_id:
-            commit_date = pd.to_datetime(commit["commit"]["author"]["date"])
-            if start_date <= commit_date < end_date:
-                return "yes"
-    return "no"
+    if not isinstance(repo_commits, pl.DataFrame):
+        repo_commits = pl.DataFrame(repo_commits, schema={"author_id": pl.Int64, "date": parquet_store.DATETIME})
+    profiles = pl.DataFrame({
+        "id": [contributor["id"] for contributor, _ in profiled],
+        "created_date": [created_date.to_pydatetime() for _, created_date in profiled],
+    }, schema={"id": pl.Int64, "created_date": parquet_store.DATETIME})
+    labels = {row["id"]: row for row in label_contributors(profiles, repo_commits, as_of, horizons).iter_rows(named=True)}
 
-def process_contributors(contributors, repo_commits):
+    filtered_contributors = []
+    for contributor, created_date in profiled:
+        user_id = contributor["id"]
+        label = labels.get(user_id)
+        if label is None:
+            print(f"\tUser {user_id} has no registration date or joined too late.")
+            continue
+
+        contributor.update({
+            "created_date": str(created_date),
+            "registration_date": str(pd.to_datetime(label["registration_date"])),
+            "user_age": label["user_age"],
+            "one_year": label["one_year"],
+            "two_years": label["two_years"],
+            "three_years": label["three_years"],
+            "LTC": label["LTC"]
+        })
+        contributor.update({f"LTC_{horizon}": label[f"LTC_{horizon}"] for horizon in horizons})
+        filtered_contributors.append(contributor)
+        print(f"\tUser {user_id} saved!")
+    return filtered_contributors
+
+def process_contributors(contributors, repo_commits, max_workers=PROFILE_WORKERS, as_of=AS_OF, horizons=HORIZONS):
     """
     Function that updates contributors JSON 
     with created_date, registration_date, user_age, and LTC status.
+    repo_commits is a frame or list of records with author_id and date.
+    Profiles are fetched concurrently and kept in contributor order.
     """
-    current_year = 2025
-    filtered_contributors = []
-    
-    for contributor in contributors:
-        # Filter out contributors that are bots
-        if contributor.get("type") == "Bot" or "bot" in contributor.get("login", "").lower():
-            continue
-
-        user_id = contributor["id"]
-        user_data = get_user_data(contributor["url"], user_id)
-        
+    # Filter out contributors that are bots before fetching anything
+    contributors = [
+        contributor for contributor in contributors
+        if not (contributor.get("type") == "Bot" or "bot" in contributor.get("login", "").lower())
+    ]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        user_profiles = list(executor.map(
+            lambda contributor: get_user_data(contributor["url"], contributor["id"]), contributors
+        ))
+
+    profiled = []
+    for contributor, user_data in zip(contributors, user_profiles):
         if not user_data: # no data found
             continue
         
         created_date = pd.to_datetime(user_data.get("created_at")) # day the account was created
         
         # Filter out if contributor doesn't have a create date
-        if not created_date: 
+        if pd.isna(created_date): 
             print("\tCould not get created date.")
             continue
-        
-        # Filter out if contributor doesn't have a registration date
-        registration_date = pd.to_datetime(get_first_commit(user_id, repo_commits))
-
-        if not registration_date:
-            print("\tCould not get registration date.")
-            continue
-        
-        registration_year = registration_date.year
-
-        user_age = (registration_date - created_date).days
-        
-        # Filter out contributors who joined less than 3 years ago
-        if registration_year > current_year - 3 or user_age < 0: # Can't computer if they're a LTC
-            print("\tUser {user_id} joined too late.")
-            continue
+        profiled.append((contributor, created_date))
+    return apply_labels(profiled, repo_commits, as_of, horizons)
 
-        # calculate if user has made any commits or pushes in three years
-        one_year_date = pd.to_datetime(registration_date + relativedelta(years=1))
-        two_year_date = pd.to_datetime(registration_date + relativedelta(years=2))
-        three_year_date = pd.to_datetime(registration_date + relativedelta(years=3))
-        four_year_date = pd.to_datetime(registration_date + relativedelta(years=4))
-        
-    
-        one_year = has_commit_in_year(user_id, one_year_date, two_year_date, repo_commits)
-        two_years = has_commit_in_year(user_id, two_year_date, three_year_date, repo_commits)
-        three_years = has_commit_in_year(user_id, three_year_date, four_year_date, repo_commits)
-        
-        ltc = "yes" if one_year == "yes" and two_years == "yes" and three_years == "yes" else "no"
-        
-        contributor.update({
-            "created_date": str(created_date),
-            "registration_date": str(registration_date),
-            "user_age": user_age,
-            "one_year": one_year,
-            "two_years": two_years,
-            "three_years": three_years,
-            "LTC": ltc
-        })
-        filtered_contributors.append(contributor)
-        print(f"\tUser {user_id} saved!")
-    return filtered_contributors
+def relabel_contributors(contributors, repo_commits, as_of=AS_OF, horizons=HORIZONS):
+    """
+    Function that recomputes the labels of saved contributors
+    from their stored created_date, without any API calls.
+    """
+    profiled = [(contributor, pd.to_datetime(contributor["created_date"]))
+                for contributor in contributors if contributor.get("created_date")]
+    return apply_labels(profiled, repo_commits, as_of, horizons)
 
     
-def main():
+def main(as_of=AS_OF, horizons=HORIZONS, relabel=False):
+    github_api.enable_cache()
+    user_store.enable_store()
     save_path = "../FilteredContributors/"
     os.makedirs(save_path, exist_ok=True)
 
@@ -170,22 +188,29 @@ def main():
         # Check if the file already exists
         file_path = f"{save_path}contributors_{repo['name']}.json"
         
-        if not os.path.exists(file_path):
-            print(f"Getting data for repo {i}: {repo['name']}...")
-            repo_directory = f"../Datasets/{repo['name']}/"
-            with open(f"{repo_directory}contributors_{repo['name']}.json", "r", encoding='utf-8') as f:
-                contributor_list = json.load(f)
-        
-            with open(f"{repo_directory}commits_{repo['name']}.json", "r", encoding='utf-8') as f:
-                commits_list = json.load(f)
-            
-            filtered_contributors = process_contributors(contributor_list, commits_list)
-            # If the file doesn't exist, write the filtered contributors
+        if not dataset_io.dataset_exists(repo['name'], "contributors") or not dataset_io.dataset_exists(repo['name'], "commits"):
+            print(f"Data for {i}:{repo['name']} is missing or incomplete, skipping.")
+        elif not os.path.exists(file_path) or relabel:
+            commits_list = parquet_store.load_table(
+                repo['name'], "commits", ["author_id", "date"],
+                pl.col("author_id").is_not_null() & pl.col("date").is_not_null())
+            if os.path.exists(file_path):
+                # Recompute the labels of the saved contributors for new horizons
+                print(f"Relabelling repo {i}: {repo['name']}...")
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    filtered_contributors = relabel_contributors(json.load(f), commits_list, as_of, horizons)
+            else:
+                print(f"Getting data for repo {i}: {repo['name']}...")
+                contributor_list = dataset_io.iter_dataset(repo['name'], "contributors")
+                filtered_contributors = process_contributors(contributor_list, commits_list,
+                                                             as_of=as_of, horizons=horizons)
+            # Write the filtered contributors
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(filtered_contributors, f, ensure_ascii=False, indent=4)
         else:
             print(f"File for {i}:{repo['name']} already exists, skipping.")
+    github_api.report()
+    user_store.report()
                 
 if __name__ == "__main__":
-    # remaining, reset_time = check_rate_limit()
     main()
\ No newline at end of file
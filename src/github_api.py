@@ -0,0 +1,281 @@
+""" This code provides shared access to the GitHub API.
+    All requests of a process go through a pool of every configured token.
+    Each token has a rate limit governor that reads the rate limit 
+    headers of normal responses.
+"""
+from dotenv import load_dotenv
+import threading
+import asyncio
+import time
+import os
+import requests
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from response_cache import ResponseCache
+
+load_dotenv()
+
+TOKEN_VARIABLES = [
+    "GITHUB_TOKEN", "GITHUB_TOKEN1", "GITHUB_TOKEN2", "GITHUB_TOKEN3",
+    "GIT_TOKEN1", "GIT_TOKEN2", "GIT_TOKEN3"
+]
+RATE_LIMIT = 5000       # hourly budget of an authenticated token
+RESERVE_REQUESTS = 500  # start spreading requests over the window below this budget
+MIN_INTERVAL = 0.0      # seconds between requests while the budget is healthy
+
+class RateLimitGovernor:
+    """
+    Rate limit state of one token shared by all threads.
+    Updated from the X-RateLimit-* and Retry-After headers
+    of every response, so no /rate_limit calls are needed.
+    """
+    def __init__(self, reserve=RESERVE_REQUESTS):
+        self.lock = threading.Lock()
+        self.reserve = reserve
+        self.remaining = None  # unknown until the first response
+        self.reset_time = 0
+        self.retry_until = 0
+        self.next_slot = 0
+
+    def update(self, headers, status_code=200):
+        """
+        Function that records the rate limit state of a response.
+        Returns True if the request was rejected by a rate limit.
+        """
+        now = time.time()
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_time = headers.get("X-RateLimit-Reset")
+        retry_after = headers.get("Retry-After")
+        with self.lock:
+            if remaining is not None and reset_time is not None:
+                reset_time = int(reset_time)
+                # Responses may arrive out of order, keep the most pessimistic value of the window
+                if reset_time != self.reset_time or self.remaining is None:
+                    self.remaining = int(remaining)
+                else:
+                    self.remaining = min(self.remaining, int(remaining))
+                self.reset_time = reset_time
+            if retry_after is not None:
+                self.retry_until = max(self.retry_until, now + int(retry_after))
+        limited = status_code in (403, 429) and (remaining == "0" or retry_after is not None)
+        return limited
+
+    def budget(self):
+        """
+        Function that returns the requests left in the current window
+        and the seconds until the token can next be used.
+        """
+        now = time.time()
+        with self.lock:
+            if self.remaining is None or now >= self.reset_time:
+                budget, available = RATE_LIMIT, now
+            elif self.remaining <= 0:
+                budget, available = 0, self.reset_time
+            else:
+                budget, available = self.remaining, now
+            return budget, max(available, self.retry_until) - now
+
+    def delay(self):
+        """
+        Function that reserves a slot for the next request.
+        Returns the seconds to wait before sending it.
+        """
+        now = time.time()
+        with self.lock:
+            if self.retry_until > now:
+                return self.retry_until - now
+            if self.remaining is None or now >= self.reset_time:
+                return 0
+            if self.remaining <= 0:
+                return self.reset_time - now + 1
+            # Spread the rest of the budget evenly over the window instead of draining it
+            interval = MIN_INTERVAL
+            if self.remaining < self.reserve:
+                interval = max(interval, (self.reset_time - now) / self.remaining)
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + interval
+            self.remaining -= 1
+            return slot - now
+
+    def wait(self):
+        """
+        Function that blocks the calling thread
+        until the next request may be sent.
+        """
+        wait_time = self.delay()
+        if wait_time > 60:
+            print(f"\t\tRate limit exceeded! Waiting {wait_time:.2f} seconds before retrying...")
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    async def wait_async(self):
+        """
+        Function that suspends the calling task
+        until the next request may be sent.
+        """
+        wait_time = self.delay()
+        if wait_time > 60:
+            print(f"\t\tRate limit exceeded! Waiting {wait_time:.2f} seconds before retrying...")
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+def load_tokens():
+    """
+    Function that returns every configured token without duplicates.
+    Extra tokens can be listed comma separated in GITHUB_TOKENS.
+    """
+    tokens = [os.getenv(name) for name in TOKEN_VARIABLES]
+    tokens += os.getenv("GITHUB_TOKENS", "").split(",")
+    tokens = list(dict.fromkeys(token.strip() for token in tokens if token and token.strip()))
+    return tokens or [None]  # fall back to unauthenticated requests
+
+class TokenPool:
+    """
+    Pool of tokens that routes each request to the token
+    with the most remaining budget.
+    """
+    def __init__(self, tokens):
+        self.lock = threading.Lock()
+        self.governors = {token: RateLimitGovernor() for token in tokens}
+        self.requests = {token: 0 for token in tokens}
+        self.started = time.time()
+
+    def acquire(self):
+        """
+        Function that picks the token to use for the next request.
+        Tokens that are usable now are preferred, then the largest budget.
+        """
+        best_token, best_key = None, None
+        for token, governor in self.governors.items():
+            budget, wait_time = governor.budget()
+            key = (wait_time, -budget)
+            if best_key is None or key < best_key:
+                best_token, best_key = token, key
+        return best_token
+
+    def headers(self, token, extra_headers=None):
+        """
+        Function that returns the request headers for a token.
+        """
+        headers = {"Authorization": f"token {token}"} if token else {}
+        if extra_headers:
+            headers.update(extra_headers)
+        return headers
+
+    def update(self, token, headers, status_code=200):
+        """
+        Function that records a response sent with the given token.
+        Returns True if the request was rejected by a rate limit.
+        """
+        with self.lock:
+            self.requests[token] += 1
+        return self.governors[token].update(headers, status_code)
+
+    def throughput(self):
+        """
+        Function that returns the aggregate number 
+        of requests per hour since the pool was created.
+        """
+        hours = max(time.time() - self.started, 1) / 3600
+        return sum(self.requests.values()) / hours
+
+    def report(self):
+        """
+        Function that prints the aggregate throughput 
+        and the state of each token.
+        """
+        print(f"Sent {sum(self.requests.values())} requests with {len(self.governors)} tokens "
+              f"({self.throughput():.0f} requests/hour).")
+        for i, (token, governor) in enumerate(self.governors.items()):
+            budget, wait_time = governor.budget()
+            print(f"\tToken {i}: {self.requests[token]} requests, {budget} remaining, "
+                  f"available in {wait_time:.0f} seconds")
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+POOL = TokenPool(load_tokens())
+GRAPHQL_POOL = TokenPool(load_tokens())  # GraphQL has its own hourly points budget per token
+SEARCH_POOL = TokenPool(load_tokens())   # so does the Search API, per minute
+CACHE = None  # set by enable_cache()
+
+def enable_cache(**options):
+    """
+    Function that turns on the on-disk response cache for this process.
+    Options are passed to ResponseCache (path, max_age, max_bytes).
+    """
+    global CACHE
+    if CACHE is None:
+        CACHE = ResponseCache(**options)
+    return CACHE
+
+def send(url, params=None, headers=None, method="GET", json_body=None, pool=POOL):
+    """
+    Function that sends a request with the token that has the most budget left.
+    Requests rejected by a rate limit are retried after the advertised wait.
+    """
+    while True:
+        token = pool.acquire()
+        pool.governors[token].wait()
+        response = requests.request(method, url, headers=pool.headers(token, headers), params=params, json=json_body)
+        if not pool.update(token, response.headers, response.status_code):
+            return response
+
+def post_graphql(query, variables=None):
+    """
+    Function that sends a GraphQL query through the GraphQL token pool.
+    """
+    return send(GRAPHQL_URL, method="POST", json_body={"query": query, "variables": variables or {}}, pool=GRAPHQL_POOL)
+
+def search(url, params=None):
+    """
+    Function that sends a Search API request through the search token pool.
+    """
+    return send(url, params=params, pool=SEARCH_POOL)
+
+def cache_key(url, params=None):
+    """
+    Function that returns the URL a response is cached under: the URL
+    requests sends, with its query parameters in sorted order, so a page
+    reached through params, a Link header or page_url() shares one entry.
+    """
+    parts = urlsplit(requests.Request("GET", url, params=params).prepare().url)
+    return urlunsplit(parts._replace(query=urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))))
+
+def get(url, params=None, headers=None, revalidate=False):
+    """
+    Function that sends a GET request, answering it from the
+    response cache when enabled. Stale entries, or every entry
+    with revalidate, are revalidated with a conditional request.
+    """
+    if CACHE is None:
+        return send(url, params, headers)
+
+    key = cache_key(url, params)
+    entry = CACHE.lookup(key)
+    if entry and CACHE.is_fresh(entry) and not revalidate:
+        CACHE.record("hits")
+        return CACHE.to_response(key, entry)
+    if entry:
+        headers = {**(headers or {}), **CACHE.conditional_headers(entry)}
+
+    response = send(url, params, headers)
+    if entry and response.status_code == 304:
+        CACHE.record("revalidated")
+        CACHE.revalidate(key)
+        return CACHE.to_response(key, entry)
+    CACHE.record("misses")
+    if response.status_code == 200:
+        CACHE.store(key, response.headers, response.content)
+    return response
+
+def report():
+    """
+    Function that prints the request statistics of this process.
+    """
+    POOL.report()
+    if sum(SEARCH_POOL.requests.values()):
+        print("Search:")
+        SEARCH_POOL.report()
+    if sum(GRAPHQL_POOL.requests.values()):
+        print("GraphQL:")
+        GRAPHQL_POOL.report()
+    if CACHE is not None:
+        CACHE.report()
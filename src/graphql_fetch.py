@@ -0,0 +1,399 @@
+""" This code downloads issues and pull requests with the GitHub GraphQL API.
+    Every query returns 100 issues or pull requests together with their
+    comments and timeline events, which the REST API fetches with one call
+    chain per issue. The nodes are converted to the shape of the REST
+    responses and saved to the same per-repository datasets.
+"""
+import threading
+import time
+import re
+import github_api
+import dataset_io
+
+PAGE_SIZE = 100    # issues or pull requests per query, the GraphQL maximum
+NESTED_SIZE = 100  # comments and timeline events per issue fetched in the same query
+MAX_RETRIES = 6
+API_URL = "https://api.github.com/repos"
+GRAPHQL_TYPES = ["issues", "issue_comments", "issue_events", "pull_requests"]
+
+# Timeline items that are also returned by the REST issue events endpoint.
+# The classic project events (added_to_project, moved_columns_in_project,
+# removed_from_project, converted_note_to_issue) are not in the GraphQL
+# timeline, so the event counts of GraphQL datasets can be lower.
+ISSUE_EVENT_TYPES = [
+    "AssignedEvent", "UnassignedEvent", "ClosedEvent", "ReopenedEvent",
+    "LabeledEvent", "UnlabeledEvent", "ReferencedEvent", "MilestonedEvent",
+    "DemilestonedEvent", "RenamedTitleEvent", "LockedEvent", "UnlockedEvent",
+    "MarkedAsDuplicateEvent", "UnmarkedAsDuplicateEvent", "MentionedEvent",
+    "SubscribedEvent", "UnsubscribedEvent", "PinnedEvent", "UnpinnedEvent",
+    "TransferredEvent", "ConnectedEvent", "DisconnectedEvent", "CommentDeletedEvent",
+    "ConvertedToDiscussionEvent", "UserBlockedEvent",
+]
+PULL_REQUEST_EVENT_TYPES = ISSUE_EVENT_TYPES + [
+    "MergedEvent", "HeadRefDeletedEvent", "HeadRefRestoredEvent", "HeadRefForcePushedEvent",
+    "BaseRefChangedEvent", "BaseRefForcePushedEvent", "ReviewRequestedEvent",
+    "ReviewRequestRemovedEvent", "ReviewDismissedEvent", "ConvertToDraftEvent", "ReadyForReviewEvent",
+    "AutoMergeEnabledEvent", "AutoMergeDisabledEvent", "AutoSquashEnabledEvent", "AutoRebaseEnabledEvent",
+    "AutomaticBaseChangeSucceededEvent", "AutomaticBaseChangeFailedEvent",
+    "DeployedEvent", "DeploymentEnvironmentChangedEvent",
+]
+EVENT_FIELDS = {"ReferencedEvent": "commit { oid }", "MergedEvent": "commit { oid }"}
+EVENT_NAMES = {"RenamedTitleEvent": "renamed"}  # REST names that differ from the type name
+
+ACTOR_FRAGMENT = "fragment actor on Actor { login __typename ... on User { databaseId } ... on Bot { databaseId } }"
+RATE_LIMIT_FIELDS = "rateLimit { cost remaining resetAt }"
+ISSUE_FIELDS = "id databaseId number url title body state createdAt updatedAt closedAt author { ...actor }"
+COMMENT_FIELDS = "id databaseId url body createdAt updatedAt author { ...actor }"
+
+KINDS = {
+    "Issue": {
+        "connection": "issues",
+        "fields": ISSUE_FIELDS,
+        "events": ISSUE_EVENT_TYPES,
+    },
+    "PullRequest": {
+        "connection": "pullRequests",
+        "fields": ISSUE_FIELDS + " mergedAt headRefOid headRefName baseRefName",
+        "events": PULL_REQUEST_EVENT_TYPES,
+    },
+}
+
+COST = {"queries": 0, "points": 0, "remaining": None}
+COST_LOCK = threading.Lock()
+
+def item_type(type_name):
+    """
+    Function that returns the timeline enum value of
+    an event type, e.g. AssignedEvent -> ASSIGNED_EVENT.
+    """
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", type_name).upper()
+
+def event_name(type_name):
+    """
+    Function that returns the REST event name of
+    an event type, e.g. HeadRefDeletedEvent -> head_ref_deleted.
+    """
+    if type_name in EVENT_NAMES:
+        return EVENT_NAMES[type_name]
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", type_name[:-len("Event")]).lower()
+
+def nested_selection(field, arguments, fields):
+    """
+    Function that returns the selection of a paginated connection.
+    """
+    return f"{field}({arguments}) {{ pageInfo {{ hasNextPage endCursor }} nodes {{ {fields} }} }}"
+
+def timeline_selection(kind, arguments):
+    """
+    Function that returns the selection of the timeline events of an issue or pull request.
+    """
+    event_types = KINDS[kind]["events"]
+    arguments += f", itemTypes: [{', '.join(item_type(name) for name in event_types)}]"
+    fields = "__typename " + " ".join(
+        f"... on {name} {{ id createdAt actor {{ ...actor }} {EVENT_FIELDS.get(name, '')} }}"
+        for name in event_types
+    )
+    return nested_selection("timelineItems", arguments, fields)
+
+def nested_fields(kind, field, arguments):
+    """
+    Function that returns the selection of the comments or timeline of an issue.
+    """
+    if field == "comments":
+        return nested_selection("comments", arguments, COMMENT_FIELDS)
+    return timeline_selection(kind, arguments)
+
+def page_query(kind):
+    """
+    Function that returns the query for a page of issues or pull requests
+    with the first page of their comments and timeline events.
+    """
+    config = KINDS[kind]
+    nested = " ".join(nested_fields(kind, field, f"first: {NESTED_SIZE}") for field in ("comments", "timelineItems"))
+    return f"""
+query($owner: String!, $name: String!, $cursor: String) {{
+  repository(owner: $owner, name: $name) {{
+    {config['connection']}(first: {PAGE_SIZE}, after: $cursor, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
+      pageInfo {{ hasNextPage endCursor }}
+      nodes {{ {config['fields']} {nested} }}
+    }}
+  }}
+  {RATE_LIMIT_FIELDS}
+}}
+{ACTOR_FRAGMENT}"""
+
+def nested_query(kind, field):
+    """
+    Function that returns the query for the next page of
+    the comments or timeline events of a single issue.
+    """
+    selection = nested_fields(kind, field, f"first: {NESTED_SIZE}, after: $cursor")
+    return f"""
+query($id: ID!, $cursor: String) {{
+  node(id: $id) {{ ... on {kind} {{ {selection} }} }}
+  {RATE_LIMIT_FIELDS}
+}}
+{ACTOR_FRAGMENT}"""
+
+def record_cost(rate_limit):
+    """
+    Function that adds the point cost of a query to the totals.
+    """
+    with COST_LOCK:
+        COST["queries"] += 1
+        if rate_limit:
+            COST["points"] += rate_limit["cost"]
+            COST["remaining"] = rate_limit["remaining"]
+
+def report_cost():
+    """
+    Function that prints the GraphQL points spent so far.
+    """
+    if COST["queries"]:
+        print(f"GraphQL: {COST['queries']} queries, {COST['points']} points "
+              f"({COST['points'] / COST['queries']:.1f} per query), {COST['remaining']} remaining.")
+
+def run_query(query, variables, description):
+    """
+    Function that runs a GraphQL query with retries.
+    Returns the data of the response, or None if every retry failed.
+    """
+    retries = 1
+    while retries <= MAX_RETRIES:
+        response = github_api.post_graphql(query, variables)
+        if response.status_code == 200:
+            result = response.json()
+            if result.get("data") and not result.get("errors"):
+                record_cost(result["data"].get("rateLimit"))
+                return result["data"]
+            error = result.get("errors")
+        else:
+            error = f"Status Code: {response.status_code}"
+        print(f"Error collecting {description}. {error}. Retrying {retries}/{MAX_RETRIES}...")
+        time.sleep(5)  # Wait before retrying
+        retries += 1
+    print(f"Error collecting {description}.")
+    return None
+
+def fetch_nested(kind, node, field):
+    """
+    Function that returns every item of the comments or timeline
+    of an issue, fetching the pages the page query did not include.
+    Returns None if a page could not be fetched.
+    """
+    connection = node[field]
+    items = list(connection["nodes"])
+    page_info = connection["pageInfo"]
+    while page_info["hasNextPage"]:
+        data = run_query(nested_query(kind, field), {"id": node["id"], "cursor": page_info["endCursor"]},
+                         f"{field} of #{node['number']}")
+        if data is None:
+            return None
+        connection = data["node"][field]
+        items.extend(connection["nodes"])
+        page_info = connection["pageInfo"]
+    return items
+
+def to_user(actor):
+    """
+    Function that converts an actor to a REST user object.
+    """
+    if not actor:
+        return None  # deleted account
+    return {
+        "login": actor["login"],
+        "id": actor.get("databaseId"),
+        "type": "Bot" if actor["__typename"] == "Bot" else "User"
+    }
+
+def to_state(state):
+    """
+    Function that converts a GraphQL state to the REST state,
+    merged pull requests are closed.
+    """
+    return "closed" if state == "MERGED" else state.lower()
+
+def pull_request_issue_ids(repo_url):
+    """
+    Function that returns the REST issue id of every pull request
+    by number. GraphQL only has the id of the pull request itself.
+    Returns None if a page could not be fetched.
+    """
+    issue_ids = {}
+    url = f"{repo_url}/issues"
+    params = {"state": "all", "per_page": 100}
+    while url:
+        response = github_api.get(url, params=params)
+        if response.status_code != 200:
+            print(f"Error collecting the issue ids of pull requests. Status Code: {response.status_code}")
+            return None
+        for record in response.json():
+            if "pull_request" in record:
+                issue_ids[record["number"]] = record["id"]
+        url = response.links.get('next', {}).get('url')
+        params = None  # next links already carry the query
+    return issue_ids
+
+def get_issue_id(number, repo_url, issue_ids):
+    """
+    Function that returns the REST issue id of a pull request, fetching
+    the issue when the pull request was opened after the listing.
+    Returns None if it could not be fetched.
+    """
+    if number not in issue_ids:
+        response = github_api.get(f"{repo_url}/issues/{number}")
+        if response.status_code != 200:
+            return None
+        issue_ids[number] = response.json()["id"]
+    return issue_ids[number]
+
+def to_issue(node, kind, repo_url, issue_id=None):
+    """
+    Function that converts an issue or pull request node to a REST issue.
+    Pull requests are given the id of their issue, like in the REST data.
+    """
+    url = f"{repo_url}/issues/{node['number']}"
+    issue = {
+        "id": node["databaseId"] if issue_id is None else issue_id,
+        "node_id": node["id"],
+        "number": node["number"],
+        "url": url,
+        "events_url": f"{url}/events",
+        "comments_url": f"{url}/comments",
+        "html_url": node["url"],
+        "title": node["title"],
+        "body": node["body"],
+        "state": to_state(node["state"]),
+        "user": to_user(node["author"]),
+        "created_at": node["createdAt"],
+        "updated_at": node["updatedAt"],
+        "closed_at": node["closedAt"]
+    }
+    if kind == "PullRequest":
+        issue["pull_request"] = {
+            "url": f"{repo_url}/pulls/{node['number']}",
+            "html_url": node["url"],
+            "merged_at": node["mergedAt"]
+        }
+    return issue
+
+def to_pull_request(node, repo_url):
+    """
+    Function that converts a pull request node to a REST pull request.
+    """
+    return {
+        "id": node["databaseId"],
+        "node_id": node["id"],
+        "number": node["number"],
+        "url": f"{repo_url}/pulls/{node['number']}",
+        "issue_url": f"{repo_url}/issues/{node['number']}",
+        "html_url": node["url"],
+        "title": node["title"],
+        "body": node["body"],
+        "state": to_state(node["state"]),
+        "user": to_user(node["author"]),
+        "created_at": node["createdAt"],
+        "updated_at": node["updatedAt"],
+        "closed_at": node["closedAt"],
+        "merged_at": node["mergedAt"],
+        "head": {"sha": node["headRefOid"], "ref": node["headRefName"]},
+        "base": {"ref": node["baseRefName"]}
+    }
+
+def to_comment(comment, issue, repo_url):
+    """
+    Function that converts a comment node to a REST issue comment.
+    """
+    return {
+        "id": comment["databaseId"],
+        "node_id": comment["id"],
+        "url": f"{repo_url}/issues/comments/{comment['databaseId']}",
+        "html_url": comment["url"],
+        "issue_url": issue["url"],
+        "user": to_user(comment["author"]),
+        "body": comment["body"],
+        "created_at": comment["createdAt"],
+        "updated_at": comment["updatedAt"]
+    }
+
+def to_event(item, issue):
+    """
+    Function that converts a timeline item to a REST issue event.
+    GraphQL has no numeric event ids, events are identified by node_id.
+    """
+    return {
+        "id": None,
+        "node_id": item["id"],
+        "event": event_name(item["__typename"]),
+        "actor": to_user(item["actor"]),
+        "commit_id": (item.get("commit") or {}).get("oid"),
+        "created_at": item["createdAt"],
+        "issue": {"id": issue["id"], "number": issue["number"], "url": issue["url"]}
+    }
+
+def convert_page(kind, nodes, repo_url, issue_ids=None):
+    """
+    Function that converts a page of issues or pull requests
+    to REST records keyed by data type. Pull requests are
+    looked up in issue_ids, their issue id by number.
+    Returns None if a nested page could not be fetched.
+    """
+    records = {data_type: [] for data_type in GRAPHQL_TYPES}
+    for node in nodes:
+        comments = fetch_nested(kind, node, "comments")
+        timeline = fetch_nested(kind, node, "timelineItems")
+        issue_id = None
+        if kind == "PullRequest":
+            issue_id = get_issue_id(node["number"], repo_url, issue_ids)
+            if issue_id is None:
+                return None
+        if comments is None or timeline is None:
+            return None
+        issue = to_issue(node, kind, repo_url, issue_id)
+        records["issues"].append(issue)
+        if kind == "PullRequest":
+            records["pull_requests"].append(to_pull_request(node, repo_url))
+        records["issue_comments"].extend(to_comment(comment, issue, repo_url) for comment in comments)
+        records["issue_events"].extend(to_event(item, issue) for item in timeline)
+    return records
+
+def save_to_JSON_graphql(repo, repo_directory):
+    """
+    Function that fetches issues and pull requests with their comments
+    and events, streaming each page to the issues, issue_comments,
+    issue_events and pull_requests datasets. Returns True once complete.
+    An unfinished download is discarded and the existing datasets kept.
+    """
+    owner = repo["owner"]["login"]
+    repo_name = repo["name"]
+    repo_url = f"{API_URL}/{owner}/{repo_name}"
+    issue_ids = pull_request_issue_ids(repo_url)
+    if issue_ids is None:
+        print(f"\tStopped GraphQL download for {repo_name}, kept the existing data.")
+        return False
+    writers = {data_type: dataset_io.DatasetWriter(repo_name, data_type, repo_directory) for data_type in GRAPHQL_TYPES}
+
+    for kind, config in KINDS.items():
+        connection = config["connection"]
+        query = page_query(kind)
+        print(f"\tFetching {connection} with GraphQL for {repo_name}...")
+        cursor = None
+        has_next_page = True
+        while has_next_page:
+            data = run_query(query, {"owner": owner, "name": repo_name, "cursor": cursor}, f"{connection} for {repo_name}")
+            records = data and convert_page(kind, data["repository"][connection]["nodes"], repo_url, issue_ids)
+            if records is None:
+                for writer in writers.values():
+                    writer.discard()
+                print(f"\tStopped GraphQL download for {repo_name}, kept the existing data.")
+                return False
+            for data_type, writer in writers.items():
+                writer.write_page(records[data_type])
+            page_info = data["repository"][connection]["pageInfo"]
+            cursor = page_info["endCursor"]
+            has_next_page = page_info["hasNextPage"]
+
+    for data_type, writer in writers.items():
+        writer.close()
+        print(f"\tSaved {writer.count} records for {data_type}.")
+    return True
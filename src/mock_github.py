@@ -0,0 +1,394 @@
+""" This code runs a local stand-in for the GitHub REST API.
+    It serves synthetic or previously downloaded datasets with Link
+    pagination, latency, rate limit headers and injected errors, so the
+    fetch code can be measured without spending real quota.
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, urlencode
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import threading
+import hashlib
+import random
+import json
+import time
+import dataset_io
+
+GITHUB_URL = "https://api.github.com"  # replaced by the address of the mock in every response
+DEFAULT_PER_PAGE = 30
+MAX_PER_PAGE = 100
+LATENCY = 0.05        # mean seconds before a response is sent
+JITTER = 0.5          # latency varies by this fraction either way
+RATE_LIMIT = 5000     # requests per token per window
+RATE_WINDOW = 3600    # seconds
+ERROR_RATE = 0.01     # fraction of requests answered with 502
+FORBIDDEN_RATE = 0.01 # fraction of requests answered with a secondary rate limit 403
+
+# Dataset served at each repository path
+REPO_ENDPOINTS = {
+    "contributors": "contributors",
+    "commits": "commits",
+    "comments": "commit_comments",
+    "issues": "issues",
+    "issues/comments": "issue_comments",
+    "issues/events": "issue_events",
+    "pulls": "pull_requests",
+    "pulls/comments": "pull_request_comments",
+}
+
+class MockHandler(BaseHTTPRequestHandler):
+    """
+    Request handler that passes every GET to the mock API.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.mock.handle(self)
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output readable
+
+class MockGitHub:
+    """
+    Local GitHub API serving datasets registered with add_repo().
+    Counts every request it answers by status code.
+    """
+    def __init__(self, latency=LATENCY, error_rate=ERROR_RATE, forbidden_rate=FORBIDDEN_RATE,
+                 rate_limit=RATE_LIMIT, rate_window=RATE_WINDOW, seed=0):
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.forbidden_rate = forbidden_rate
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.routes = {}
+        self.windows = {}  # token -> (reset time, remaining)
+        self.statuses = Counter()
+        self.pages = 0
+        self.server = None
+        self.base_url = None
+
+    def add_repo(self, owner, name, datasets):
+        """
+        Function that registers the datasets of a repository, keyed by data type.
+        Issue events are also served per issue (pull requests included,
+        GitHub has no pull request events endpoint), and a profile is
+        served for every contributor.
+        """
+        prefix = f"/repos/{owner}/{name}"
+        for path, data_type in REPO_ENDPOINTS.items():
+            self.routes[f"{prefix}/{path}"] = datasets.get(data_type, [])
+
+        events = {}
+        for event in datasets.get("issue_events", []):
+            events.setdefault((event.get("issue") or {}).get("number"), []).append(event)
+        for issue in datasets.get("issues", []) + datasets.get("pull_requests", []):
+            self.routes[f"{prefix}/issues/{issue['number']}/events"] = events.get(issue["number"], [])
+
+        for contributor in datasets.get("contributors", []):
+            self.routes[f"/users/{contributor['login']}"] = user_profile(contributor, self.random)
+
+    def load_recorded(self, owner, name, directory=None):
+        """
+        Function that registers the saved datasets of a repository.
+        """
+        datasets = {
+            data_type: dataset_io.load_dataset(name, data_type, directory)
+            for data_type in REPO_ENDPOINTS.values()
+            if dataset_io.dataset_exists(name, data_type, directory)
+        }
+        self.add_repo(owner, name, datasets)
+
+    def repo_object(self, owner, name, repo_id=1):
+        """
+        Function that returns a repository object like the
+        search API does, with every URL pointing at the mock.
+        """
+        url = f"{self.base_url}/repos/{owner}/{name}"
+        return {
+            "id": repo_id,
+            "name": name,
+            "full_name": f"{owner}/{name}",
+            "owner": {"login": owner},
+            "url": url,
+            "language": "Python",
+            "contributors_url": f"{url}/contributors",
+            "commits_url": f"{url}/commits{{/sha}}",
+            "comments_url": f"{url}/comments{{/number}}",
+            "issues_url": f"{url}/issues{{/number}}",
+            "issue_comment_url": f"{url}/issues/comments{{/number}}",
+            "issue_events_url": f"{url}/issues/events{{/number}}",
+            "pulls_url": f"{url}/pulls{{/number}}",
+        }
+
+    def rate_limit_headers(self, token):
+        """
+        Function that counts a request against the window of a token
+        and returns its rate limit headers.
+        """
+        now = time.time()
+        with self.lock:
+            reset_time, remaining = self.windows.get(token, (0, 0))
+            if now >= reset_time:
+                reset_time, remaining = int(now) + self.rate_window, self.rate_limit
+            remaining = max(remaining - 1, -1)
+            self.windows[token] = (reset_time, remaining)
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(remaining, 0)),
+            "X-RateLimit-Reset": str(reset_time),
+            "X-RateLimit-Used": str(self.rate_limit - max(remaining, 0)),
+            "X-RateLimit-Resource": "core",
+        }, remaining < 0
+
+    def refund(self, token, headers):
+        """
+        Function that gives back the request counted for a token,
+        GitHub does not count conditional requests answered with 304.
+        Returns the headers with the remaining requests updated.
+        """
+        with self.lock:
+            reset_time, remaining = self.windows[token]
+            remaining = min(remaining + 1, self.rate_limit)
+            self.windows[token] = (reset_time, remaining)
+        return {
+            **headers,
+            "X-RateLimit-Remaining": str(max(remaining, 0)),
+            "X-RateLimit-Used": str(self.rate_limit - max(remaining, 0)),
+        }
+
+    def handle(self, request):
+        """
+        Function that answers a single request.
+        """
+        parts = urlparse(request.path)
+        path = parts.path.rstrip("/")
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        with self.lock:
+            delay = self.latency * self.random.uniform(1 - JITTER, 1 + JITTER)
+            roll = self.random.random()
+        time.sleep(delay)
+
+        headers, exhausted = self.rate_limit_headers(request.headers.get("Authorization"))
+        if exhausted:
+            return self.respond(request, 403, {"message": "API rate limit exceeded"}, headers)
+        if roll < self.error_rate:
+            return self.respond(request, 502, {"message": "Server Error"}, headers)
+        if roll < self.error_rate + self.forbidden_rate:
+            headers["Retry-After"] = "1"
+            return self.respond(request, 403, {"message": "You have exceeded a secondary rate limit."}, headers)
+
+        route = self.routes.get(path)
+        if route is None:
+            return self.respond(request, 404, {"message": "Not Found"}, headers)
+        if isinstance(route, dict):
+            return self.respond(request, 200, route, headers)
+
+        per_page = min(int(query.get("per_page", DEFAULT_PER_PAGE)), MAX_PER_PAGE)
+        page = max(int(query.get("page", 1)), 1)
+        last_page = max((len(route) + per_page - 1) // per_page, 1)
+        links = {}
+        if page < last_page:
+            links["next"] = page + 1
+            links["last"] = last_page
+        if page > 1:
+            links["first"] = 1
+            links["prev"] = page - 1
+        if links:
+            headers["Link"] = ", ".join(
+                f'<{self.base_url}{path}?{urlencode({**query, "page": number})}>; rel="{rel}"'
+                for rel, number in links.items()
+            )
+        with self.lock:
+            self.pages += 1
+        return self.respond(request, 200, route[(page - 1) * per_page:page * per_page], headers)
+
+    def respond(self, request, status_code, data, headers):
+        """
+        Function that sends a JSON response, answering
+        304 when the client already has the same body.
+        """
+        body = json.dumps(data).replace(GITHUB_URL, self.base_url).encode("utf-8")
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if status_code == 200 and request.headers.get("If-None-Match") == etag:
+            status_code, body = 304, b""
+            headers = self.refund(request.headers.get("Authorization"), headers)
+        with self.lock:
+            self.statuses[status_code] += 1
+        request.send_response(status_code)
+        request.send_header("Content-Type", "application/json; charset=utf-8")
+        request.send_header("Content-Length", str(len(body)))
+        if status_code in (200, 304):
+            request.send_header("ETag", etag)
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(body)
+
+    def requests(self):
+        """
+        Function that returns the number of requests answered so far.
+        """
+        return sum(self.statuses.values())
+
+    def start(self, port=0):
+        """
+        Function that starts serving on a background thread.
+        Port 0 picks a free port, the address is in base_url.
+        """
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), MockHandler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        """
+        Function that stops the server.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+def format_date(date):
+    """
+    Function that formats a date like the GitHub API.
+    """
+    return date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def user_profile(contributor, rng):
+    """
+    Function that returns a user profile for a contributor.
+    """
+    created_at = datetime(2008, 1, 1, tzinfo=timezone.utc) + timedelta(days=rng.randrange(4000))
+    return {
+        "login": contributor["login"],
+        "id": contributor["id"],
+        "type": contributor.get("type", "User"),
+        "url": f"{GITHUB_URL}/users/{contributor['login']}",
+        "repos_url": f"{GITHUB_URL}/users/{contributor['login']}/repos",
+        "created_at": format_date(created_at),
+        "public_repos": rng.randrange(100),
+        "followers": rng.randrange(1000),
+        "following": rng.randrange(100),
+    }
+
+def synthetic_repo(owner, name, contributors=100, commits=1500, issues=300, pull_requests=150,
+                   comments_per_item=2, events_per_item=3, seed=0):
+    """
+    Function that generates the datasets of a repository with
+    the fields the download and feature table code read.
+    """
+    rng = random.Random(f"{seed}:{owner}/{name}")
+    repo_url = f"{GITHUB_URL}/repos/{owner}/{name}"
+    start = datetime(2012, 1, 1, tzinfo=timezone.utc)
+    span = (datetime(2024, 1, 1, tzinfo=timezone.utc) - start).days * 86400
+    base_id = rng.randrange(1, 10 ** 6) * 1000
+
+    def date():
+        return format_date(start + timedelta(seconds=rng.randrange(span)))
+
+    def user():
+        person = rng.choice(people)
+        return {"login": person["login"], "id": person["id"], "type": person["type"]}
+
+    people = [
+        {
+            "login": f"{name}-user{i}" + ("[bot]" if i % 25 == 24 else ""),
+            "id": base_id + i,
+            "type": "Bot" if i % 25 == 24 else "User",
+            "url": f"{GITHUB_URL}/users/{name}-user{i}",
+        }
+        for i in range(contributors)
+    ]
+    commit_list = [
+        {
+            "sha": hashlib.sha1(f"{name}{i}".encode()).hexdigest(),
+            "author": user(),
+            "commit": {"author": {"date": date()}},
+        }
+        for i in range(commits)
+    ]
+    issue_list, pull_list, issue_comments, issue_events, pull_comments = [], [], [], [], []
+    for number in range(1, issues + pull_requests + 1):
+        url = f"{repo_url}/issues/{number}"
+        issue = {
+            "id": base_id + 100000 + number,
+            "number": number,
+            "url": url,
+            "events_url": f"{url}/events",
+            "user": user(),
+            "created_at": date(),
+            "updated_at": date(),
+        }
+        issue_list.append(issue)
+        if number > issues:
+            head_sha = rng.choice(commit_list)["sha"]
+            pull_list.append({
+                "id": base_id + 200000 + number,
+                "number": number,
+                "url": f"{repo_url}/pulls/{number}",
+                "user": issue["user"],
+                "head": {"sha": head_sha},
+                "created_at": issue["created_at"],
+                "updated_at": issue["updated_at"],
+            })
+            pull_comments.extend({
+                "id": base_id + 300000 + number * 10 + i,
+                "pull_request_url": f"{repo_url}/pulls/{number}",
+                "commit_id": head_sha,
+                "user": user(),
+                "body": "Looks good to me, thanks for the change",
+                "created_at": date(),
+            } for i in range(comments_per_item))
+        issue_comments.extend({
+            "id": base_id + 400000 + number * 10 + i,
+            "issue_url": url,
+            "user": user(),
+            "body": "I can reproduce this on the latest version",
+            "created_at": date(),
+        } for i in range(comments_per_item))
+        issue_events.extend({
+            "id": base_id + 500000 + number * 10 + i,
+            "issue": {"id": issue["id"], "number": number, "url": url},
+            "actor": user(),
+            "event": rng.choice(["closed", "assigned", "labeled", "merged", "referenced"]),
+            "created_at": date(),
+        } for i in range(events_per_item))
+    commit_comments = [
+        {
+            "id": base_id + 600000 + i,
+            "user": user(),
+            "commit_id": rng.choice(commit_list)["sha"],
+            "body": "Why was this line removed here",
+            "created_at": date(),
+        }
+        for i in range(commits // 20)
+    ]
+    return {
+        "contributors": people,
+        "commits": commit_list,
+        "commit_comments": commit_comments,
+        "issues": issue_list,
+        "issue_comments": issue_comments,
+        "issue_events": issue_events,
+        "pull_requests": pull_list,
+        "pull_request_comments": pull_comments,
+    }
+
+def main(port=8000, repos=2):
+    mock = MockGitHub()
+    mock.start(port)
+    for i in range(repos):
+        mock.add_repo("mock", f"repo{i}", synthetic_repo("mock", f"repo{i}"))
+        print(json.dumps(mock.repo_object("mock", f"repo{i}", i + 1)))
+    print(f"Mock GitHub API listening on {mock.base_url}, press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        mock.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+""" This code computes statistics of commits per committer with a sweep line.
+    Commits are walked once in time order while the number of commits of
+    each committer is kept in an order-statistic tree, so the max, min, mean,
+    std and median at every developer's registration date (and over the month
+    after it) are read off the tree instead of recomputed from all commits.
+"""
+import math
+import numpy as np
+
+EMPTY_STATISTICS = (0, 0, 0, 0, 0)  # max, min, mean, std, median without committers
+
+class CountStatistics:
+    """
+    Multiset of commits per committer. A Fenwick tree indexed by commit count
+    holds how many committers have each count, for min, max and median,
+    next to the running sum and sum of squares for mean and std.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+        self.counts = {}  # committer -> commits
+        self.committers = 0
+        self.total = 0
+        self.squares = 0
+
+    def update(self, count, change):
+        """
+        Function that adds change committers with the given count.
+        """
+        self.committers += change
+        self.total += change * count
+        self.squares += change * count * count
+        while count <= self.size:
+            self.tree[count] += change
+            count += count & -count
+
+    def add(self, committer):
+        """
+        Function that counts one more commit of a committer.
+        """
+        count = self.counts.get(committer, 0)
+        if count:
+            self.update(count, -1)
+        self.update(count + 1, 1)
+        self.counts[committer] = count + 1
+
+    def remove(self, committer):
+        """
+        Function that counts one commit less of a committer.
+        """
+        count = self.counts[committer]
+        self.update(count, -1)
+        if count > 1:
+            self.update(count - 1, 1)
+            self.counts[committer] = count - 1
+        else:
+            del self.counts[committer]
+
+    def kth(self, k):
+        """
+        Function that returns the k-th smallest count (1-based).
+        """
+        position = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            if position + step <= self.size and self.tree[position + step] < k:
+                position += step
+                k -= self.tree[position]
+            step >>= 1
+        return position + 1
+
+    def summary(self, exclude=None):
+        """
+        Function that returns the rounded max, min, mean, std and median
+        of the counts, leaving out the count of the excluded committer.
+        Matches rounding the results of the statistics module.
+        """
+        excluded = self.counts.get(exclude, 0)
+        if excluded:
+            self.update(excluded, -1)
+        try:
+            n = self.committers
+            if not n:
+                return EMPTY_STATISTICS
+            mean = self.total / n
+            std = math.sqrt((n * self.squares - self.total ** 2) / (n * (n - 1))) if n > 1 else 0
+            if n % 2:
+                median = self.kth(n // 2 + 1)
+            else:
+                median = (self.kth(n // 2) + self.kth(n // 2 + 1)) / 2
+            return self.kth(n), self.kth(1), round(mean), round(std), round(median)
+        finally:
+            if excluded:
+                self.update(excluded, 1)
+
+def sweep_statistics(timestamps, committers, queries):
+    """
+    Function that returns the (before, month) statistics for each
+    (developer_time, month_time, developer_id) query. "before" covers the
+    commits at or before developer_time and "month" those in
+    [developer_time, month_time), both without the developer's own commits.
+    Timestamps are nanoseconds since the epoch, and month_time must not
+    decrease as developer_time grows, as with a month after the registration.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    order = np.argsort(timestamps, kind="stable")
+    timestamps = timestamps[order].tolist()
+    committers = [committers[i] for i in order.tolist()]
+
+    before = CountStatistics(len(timestamps))
+    month = CountStatistics(len(timestamps))
+    added = removed = passed = 0
+    results = [None] * len(queries)
+    # The window end moves forward with the registration date, so every pointer only advances
+    for query in sorted(range(len(queries)), key=lambda i: queries[i][:2]):
+        developer_time, month_time, developer_id = queries[query]
+        while passed < len(timestamps) and timestamps[passed] <= developer_time:
+            before.add(committers[passed])
+            passed += 1
+        while added < len(timestamps) and timestamps[added] < month_time:
+            month.add(committers[added])
+            added += 1
+        while removed < added and timestamps[removed] < developer_time:
+            month.remove(committers[removed])
+            removed += 1
+        results[query] = (before.summary(developer_id), month.summary(developer_id))
+    return results
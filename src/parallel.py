@@ -0,0 +1,135 @@
+""" This code runs a table builder over many repositories.
+    Repositories are scheduled largest first, on threads or on a pool of
+    processes. The indexes over the GHTorrent frames are built once by the
+    parent. In process mode their sorted arrays are written to .npy files
+    and the frames to Arrow IPC files that every worker memory-maps
+    instead of sorting or reading its own copy.
+"""
+import multiprocessing
+import json
+import os
+import numpy as np
+import polars as pl
+import pyarrow as pa
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+SHARED_DIRECTORY = "../Cache/shared"
+DATASET_DIRECTORY = "../Datasets"
+CONTRIBUTOR_DIRECTORY = "../FilteredContributors"
+
+WORKER_STATE = None  # arguments after (repo_num, repo) opened by each worker process
+
+def dataset_size(repo):
+    """
+    Function that returns the bytes of the datasets of a repository.
+    """
+    directory = os.path.join(DATASET_DIRECTORY, repo["name"])
+    if not os.path.isdir(directory):
+        return 0
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+def contributor_count(repo):
+    """
+    Function that returns the number of filtered contributors of a repository.
+    """
+    path = os.path.join(CONTRIBUTOR_DIRECTORY, f"contributors_{repo['name']}.json")
+    if not os.path.isfile(path):
+        return 0
+    with open(path, "r", encoding="utf-8") as f:
+        return len(json.load(f))
+
+def largest_first(repo_list, size=dataset_size):
+    """
+    Function that returns (repo_num, repo) pairs with the largest
+    repositories first, so no worker is left with a big one at the end.
+    """
+    return sorted(enumerate(repo_list), key=lambda job: size(job[1]), reverse=True)
+
+def share_state(state):
+    """
+    Function that writes a state built once by the parent for the
+    worker processes. The sorted arrays of every index are saved as .npy
+    files that workers memory-map, frames as uncompressed Arrow IPC files
+    and anything else is passed as is. Returns the description of the
+    state for load_state() and the paths to remove afterwards.
+    """
+    os.makedirs(SHARED_DIRECTORY, exist_ok=True)
+    shared, paths = [], []
+    for position, value in enumerate(state):
+        prefix = os.path.join(SHARED_DIRECTORY, f"state{position}_{os.getpid()}")
+        if isinstance(value, pl.DataFrame):
+            value.write_ipc(prefix + ".arrow", compression="uncompressed")
+            shared.append(("frame", prefix + ".arrow"))
+            paths.append(prefix + ".arrow")
+        elif hasattr(value, "arrays"):
+            arrays = {}
+            for name, array in value.arrays().items():
+                arrays[name] = f"{prefix}_{name}.npy"
+                np.save(arrays[name], array)
+            shared.append(("index", (type(value), arrays)))
+            paths.extend(arrays.values())
+        else:
+            shared.append(("value", value))
+    return shared, paths
+
+def load_state(shared):
+    """
+    Function that opens a state written by share_state(). Index arrays
+    and frames are memory-mapped read-only, so every worker reads the
+    same pages. Frames are not rechunked, which would copy them.
+    """
+    state = []
+    for kind, value in shared:
+        if kind == "frame":
+            state.append(pl.from_arrow(pa.ipc.open_file(pa.memory_map(value)).read_all(), rechunk=False))
+        elif kind == "index":
+            index_class, arrays = value
+            state.append(index_class.from_arrays({name: np.load(path, mmap_mode="r") for name, path in arrays.items()}))
+        else:
+            state.append(value)
+    return state
+
+def init_worker(shared, setup=None):
+    """
+    Function that prepares a worker process: runs setup,
+    then opens the state shared by the parent.
+    """
+    global WORKER_STATE
+    if setup is not None:
+        setup()
+    WORKER_STATE = load_state(shared)
+
+def run_job(function, repo_num, repo):
+    """
+    Function that runs one repository in a worker process.
+    """
+    return function(repo_num, repo, *WORKER_STATE)
+
+def run_repos(function, repo_list, frames, build_state, max_workers, use_processes=False, size=dataset_size,
+              setup=None):
+    """
+    Function that calls function(repo_num, repo, *build_state(frames))
+    for every repository, largest first. The state is built once: threads
+    share it directly, processes open it from the files of share_state()
+    after running setup, e.g. to open per-process caches.
+    """
+    jobs = largest_first(repo_list, size)
+    state = build_state(frames)
+    if not use_processes:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(function, i, repo, *state) for i, repo in jobs]
+            for future in futures:
+                future.result()
+        return
+
+    shared, paths = share_state(state)
+    try:
+        # Spawned workers do not inherit the parent's polars thread pool
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=init_worker, initargs=(shared, setup)) as executor:
+            futures = [executor.submit(run_job, function, i, repo) for i, repo in jobs]
+            for future in futures:
+                future.result()
+    finally:
+        for path in paths:
+            os.remove(path)
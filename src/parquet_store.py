@@ -0,0 +1,282 @@
+""" This code converts the per-repository datasets to Parquet.
+    Only the columns used by the feature tables are kept, with nested
+    fields flattened and timestamps parsed to UTC once at conversion.
+    The repository's issue events are also split into issue and pull
+    request timelines with the schema of the GHTorrent event tables.
+    The GHTorrent extracts are converted once as well, so the builders
+    scan only the rows of the repositories and users they process.
+"""
+import os
+import json
+import polars as pl
+import dataset_io
+
+DATETIME = pl.Datetime("us", "UTC")
+
+# Columns kept for each data type: column name -> (path in the API record, type)
+SCHEMAS = {
+    "contributors": {
+        "id": (("id",), pl.Int64),
+        "login": (("login",), pl.Utf8),
+        "type": (("type",), pl.Utf8),
+    },
+    "commits": {
+        "sha": (("sha",), pl.Utf8),
+        "author_id": (("author", "id"), pl.Int64),
+        "date": (("commit", "author", "date"), DATETIME),
+    },
+    "commit_comments": {
+        "id": (("id",), pl.Int64),
+        "user_id": (("user", "id"), pl.Int64),
+        "commit_id": (("commit_id",), pl.Utf8),
+        "body": (("body",), pl.Utf8),
+        "created_at": (("created_at",), DATETIME),
+    },
+    "issues": {
+        "id": (("id",), pl.Int64),
+        "url": (("url",), pl.Utf8),
+        "events_url": (("events_url",), pl.Utf8),
+        "user_id": (("user", "id"), pl.Int64),
+        "created_at": (("created_at",), DATETIME),
+        "updated_at": (("updated_at",), DATETIME),
+    },
+    "issue_comments": {
+        "id": (("id",), pl.Int64),
+        "issue_url": (("issue_url",), pl.Utf8),
+        "user_id": (("user", "id"), pl.Int64),
+        "body": (("body",), pl.Utf8),
+        "created_at": (("created_at",), DATETIME),
+    },
+    "issue_events": {
+        "id": (("id",), pl.Int64),
+        "issue_id": (("issue", "id"), pl.Int64),
+        "issue_number": (("issue", "number"), pl.Int64),
+        "actor_id": (("actor", "id"), pl.Int64),
+        "event": (("event",), pl.Utf8),
+        "created_at": (("created_at",), DATETIME),
+    },
+    "pull_requests": {
+        "id": (("id",), pl.Int64),
+        "number": (("number",), pl.Int64),
+        "url": (("url",), pl.Utf8),
+        "user_id": (("user", "id"), pl.Int64),
+        "head_sha": (("head", "sha"), pl.Utf8),
+        "created_at": (("created_at",), DATETIME),
+        "updated_at": (("updated_at",), DATETIME),
+    },
+    "pull_request_comments": {
+        "id": (("id",), pl.Int64),
+        "pull_request_url": (("pull_request_url",), pl.Utf8),
+        "commit_id": (("commit_id",), pl.Utf8),
+        "user_id": (("user", "id"), pl.Int64),
+        "body": (("body",), pl.Utf8),
+        "created_at": (("created_at",), DATETIME),
+    },
+}
+
+# Timelines built from the issue events: name -> id column, same columns as the GHTorrent tables
+TIMELINES = {
+    "issue_timeline": "issue_id",
+    "pull_timeline": "pull_request_id",
+}
+# Datasets each timeline is built from
+TIMELINE_SOURCES = {
+    "issue_timeline": ["issue_events"],
+    "pull_timeline": ["issue_events", "pull_requests"],
+}
+
+GHTORRENT_DIRECTORY = "../GHTorrent Data"
+GHTORRENT_TABLES = ["commits", "issues", "issue_events", "pull_events", "watchers", "follower"]
+
+def parquet_file(repo_name, data_type, directory=None):
+    """
+    Function that returns the path of the Parquet file of a dataset.
+    """
+    return dataset_io.dataset_file(repo_name, data_type, ".parquet", directory)
+
+def get_field(record, path):
+    """
+    Function that returns a nested field of a record or None.
+    """
+    for key in path:
+        record = (record or {}).get(key)
+    return record
+
+def convert_dataset(repo_name, data_type, directory=None):
+    """
+    Function that converts one dataset to Parquet
+    with only the columns in its schema.
+    """
+    schema = SCHEMAS[data_type]
+    columns = {name: [] for name in schema}
+    for record in dataset_io.iter_dataset(repo_name, data_type, directory):
+        for name, (path, _) in schema.items():
+            columns[name].append(get_field(record, path))
+
+    frame = pl.DataFrame(
+        {name: values for name, values in columns.items()},
+        schema={name: (pl.Utf8 if dtype == DATETIME else dtype) for name, (_, dtype) in schema.items()}
+    ).with_columns([
+        pl.col(name).str.to_datetime(time_zone="UTC")
+        for name, (_, dtype) in schema.items() if dtype == DATETIME
+    ])
+    path = parquet_file(repo_name, data_type, directory)
+    frame.write_parquet(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return path
+
+def is_converted(repo_name, data_type, directory=None):
+    """
+    Function that checks if the Parquet file is newer
+    than the dataset and has the columns of its schema.
+    """
+    path = parquet_file(repo_name, data_type, directory)
+    source = dataset_io.find_dataset(repo_name, data_type, directory)
+    return (os.path.exists(path) and (source is None or os.path.getmtime(path) >= os.path.getmtime(source))
+            and list(pl.read_parquet_schema(path)) == list(SCHEMAS[data_type]))
+
+def convert_repo(repo_name, directory=None):
+    """
+    Function that converts every dataset of a repository that changed
+    and rebuilds its event timelines.
+    """
+    for data_type in SCHEMAS:
+        if dataset_io.dataset_exists(repo_name, data_type, directory) and not is_converted(repo_name, data_type, directory):
+            convert_dataset(repo_name, data_type, directory)
+    for name in TIMELINES:
+        if has_sources(repo_name, name, directory) and not timeline_built(repo_name, name, directory):
+            build_timeline(repo_name, name, directory)
+
+def scan_table(repo_name, data_type, directory=None):
+    """
+    Function that returns a lazy frame over a dataset, converting
+    it first if the Parquet file is missing or out of date.
+    """
+    if not is_converted(repo_name, data_type, directory):
+        convert_dataset(repo_name, data_type, directory)
+    return pl.scan_parquet(parquet_file(repo_name, data_type, directory))
+
+def load_table(repo_name, data_type, columns=None, predicate=None, directory=None):
+    """
+    Function that loads a dataset with only the given columns
+    and rows. Both are pushed down into the Parquet reader.
+    """
+    frame = scan_table(repo_name, data_type, directory)
+    if predicate is not None:
+        frame = frame.filter(predicate)
+    if columns:
+        frame = frame.select(columns)
+    return frame.collect()
+
+def build_timeline(repo_name, name, directory=None):
+    """
+    Function that builds the issue or pull request timeline of a
+    repository from its issue events, fetched from the repository-wide
+    events endpoint. Pull request events are matched by issue number.
+    """
+    events = load_table(
+        repo_name, "issue_events", ["issue_id", "issue_number", "actor_id", "event", "created_at"],
+        pl.col("created_at").is_not_null(), directory
+    ).rename({"event": "action"})
+    if name == "issue_timeline":
+        timeline = events.filter(pl.col("issue_id").is_not_null())
+    else:
+        pull_requests = load_table(
+            repo_name, "pull_requests", ["id", "number"], pl.col("number").is_not_null(), directory
+        ).unique().rename({"id": "pull_request_id", "number": "issue_number"})
+        timeline = events.join(pull_requests, on="issue_number")
+    path = parquet_file(repo_name, name, directory)
+    timeline.select([TIMELINES[name], "actor_id", "action", "created_at"]).write_parquet(path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+def has_sources(repo_name, name, directory=None):
+    """
+    Function that checks if the datasets a timeline is built from were downloaded.
+    """
+    return all(dataset_io.dataset_exists(repo_name, data_type, directory) for data_type in TIMELINE_SOURCES[name])
+
+def timeline_built(repo_name, name, directory=None):
+    """
+    Function that checks if an event timeline is newer than its sources.
+    """
+    path = parquet_file(repo_name, name, directory)
+    sources = [parquet_file(repo_name, data_type, directory) for data_type in TIMELINE_SOURCES[name]]
+    return (all(is_converted(repo_name, data_type, directory) for data_type in TIMELINE_SOURCES[name])
+            and os.path.exists(path)
+            and os.path.getmtime(path) >= max(os.path.getmtime(source) for source in sources))
+
+def load_timeline(repo_name, name, directory=None):
+    """
+    Function that loads the issue or pull request event timeline
+    of a repository, building it first if it is out of date. Without
+    the datasets it is built from the timeline is empty.
+    """
+    if not has_sources(repo_name, name, directory):
+        print(f"{repo_name} - Missing {' or '.join(TIMELINE_SOURCES[name])}, the {name} is empty.")
+        return pl.DataFrame(schema={TIMELINES[name]: pl.Int64, "actor_id": pl.Int64, "action": pl.Utf8, "created_at": DATETIME})
+    if not timeline_built(repo_name, name, directory):
+        build_timeline(repo_name, name, directory)
+    return pl.read_parquet(parquet_file(repo_name, name, directory))
+
+def collect_ids(repo_list, data_type, directory=None):
+    """
+    Function that returns the ids of a dataset across repositories.
+    """
+    ids = set()
+    for repo in repo_list:
+        if dataset_io.dataset_exists(repo["name"], data_type, directory):
+            ids.update(load_table(repo["name"], data_type, ["id"], directory=directory)["id"].drop_nulls().to_list())
+    return ids
+
+def ghtorrent_file(name, directory=GHTORRENT_DIRECTORY):
+    """
+    Function that returns the path of the Parquet file of a GHTorrent extract.
+    """
+    return os.path.join(directory, f"{name}_filtered.parquet")
+
+def convert_ghtorrent(name, directory=GHTORRENT_DIRECTORY):
+    """
+    Function that converts a GHTorrent CSV extract to Parquet
+    with created_at parsed to UTC, streaming it in batches.
+    """
+    path = ghtorrent_file(name, directory)
+    pl.scan_csv(os.path.join(directory, f"{name}_filtered.csv")).with_columns(
+        pl.col("created_at").str.strptime(pl.Datetime, strict=False).dt.replace_time_zone("UTC")
+    ).sink_parquet(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return path
+
+def scan_ghtorrent(name, directory=GHTORRENT_DIRECTORY):
+    """
+    Function that returns a lazy frame over a GHTorrent extract,
+    converting it first if the Parquet file is missing or out of date.
+    """
+    path = ghtorrent_file(name, directory)
+    source = os.path.join(directory, f"{name}_filtered.csv")
+    if not os.path.exists(path) or (os.path.exists(source) and os.path.getmtime(path) < os.path.getmtime(source)):
+        convert_ghtorrent(name, directory)
+    return pl.scan_parquet(path)
+
+def load_ghtorrent(name, column, values, directory=GHTORRENT_DIRECTORY):
+    """
+    Function that loads the rows of a GHTorrent extract whose column is
+    in values. The filter is pushed down into the Parquet reader.
+    """
+    values = pl.lit(pl.Series(column, sorted(values), dtype=pl.Int64)).implode()
+    return scan_ghtorrent(name, directory).filter(pl.col(column).is_in(values)).collect()
+
+def main():
+    with open("../filteredRepos.json", "r", encoding="utf-8") as f:
+        repo_list = json.load(f)
+
+    for i, repo in enumerate(repo_list):
+        print(f"Converting datasets for {i}: {repo['name']}...")
+        convert_repo(repo["name"])
+
+    for name in GHTORRENT_TABLES:
+        if os.path.exists(os.path.join(GHTORRENT_DIRECTORY, f"{name}_filtered.csv")):
+            print(f"Converting GHTorrent {name}...")
+            scan_ghtorrent(name)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+""" This code stores GitHub API responses on disk.
+    Cached responses are revalidated with If-None-Match/If-Modified-Since,
+    GitHub does not count 304 responses against the rate limit.
+"""
+from requests.structures import CaseInsensitiveDict
+import threading
+import sqlite3
+import time
+import os
+import requests
+
+CACHE_PATH = "../Cache/github_responses.sqlite"
+CACHE_MAX_AGE = 24 * 3600             # seconds a cached body is served without revalidation
+CACHE_MAX_BYTES = 2 * 1024 ** 3        # total size of cached bodies before LRU eviction
+CACHE_BUSY_TIMEOUT = 30                # seconds to wait for a write lock held by another process
+
+class ResponseCache:
+    """
+    Persistent response cache keyed by URL with LRU eviction.
+    """
+    def __init__(self, path=CACHE_PATH, max_age=CACHE_MAX_AGE, max_bytes=CACHE_MAX_BYTES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        # Worker processes share the file: WAL lets them read while one writes
+        # and the timeout makes a writer wait for the lock instead of failing
+        self.connection = sqlite3.connect(path, timeout=CACHE_BUSY_TIMEOUT, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                link TEXT,
+                body BLOB,
+                size INTEGER,
+                fetched_at REAL,
+                last_used REAL
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.connection.commit()
+        self.size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def lookup(self, url):
+        """
+        Function that returns the cached entry of a URL or None.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT etag, last_modified, link, body, fetched_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute("UPDATE responses SET last_used = ? WHERE url = ?", (time.time(), url))
+            self.connection.commit()
+        etag, last_modified, link, body, fetched_at = row
+        return {"etag": etag, "last_modified": last_modified, "link": link, "body": body, "fetched_at": fetched_at}
+
+    def is_fresh(self, entry):
+        """
+        Function that checks if an entry can be served without revalidation.
+        """
+        return time.time() - entry["fetched_at"] < self.max_age
+
+    def conditional_headers(self, entry):
+        """
+        Function that returns the validators to send for a cached entry.
+        """
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, outcome):
+        """
+        Function that counts a hit, revalidation or miss.
+        """
+        with self.lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def store(self, url, headers, body):
+        """
+        Function that stores the body of a successful response and
+        evicts the least recently used entries above the size bound.
+        """
+        now = time.time()
+        with self.lock:
+            old = self.connection.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, headers.get("ETag"), headers.get("Last-Modified"),
+                 headers.get("Link"), body, len(body), now, now)
+            )
+            self.size += len(body) - (old[0] if old else 0)
+            self.evict()
+            self.connection.commit()
+
+    def revalidate(self, url):
+        """
+        Function that marks a cached entry as fresh after a 304 response.
+        """
+        with self.lock:
+            self.connection.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self.connection.commit()
+
+    def evict(self):
+        """
+        Function that removes least recently used entries
+        until the cache fits in max_bytes. Caller holds the lock.
+        """
+        while self.size > self.max_bytes:
+            rows = self.connection.execute(
+                "SELECT url, size FROM responses ORDER BY last_used LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            for url, size in rows:
+                self.connection.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self.size -= size
+                if self.size <= self.max_bytes:
+                    break
+
+    def to_response(self, url, entry):
+        """
+        Function that rebuilds a response object from a cached entry.
+        """
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.encoding = "utf-8"
+        response._content = entry["body"]
+        response.headers = CaseInsensitiveDict({"Link": entry["link"]} if entry["link"] else {})
+        return response
+
+    def report(self):
+        """
+        Function that prints the hit and miss statistics of the cache.
+        """
+        total = self.hits + self.revalidated + self.misses
+        hit_rate = (self.hits + self.revalidated) / total if total else 0
+        print(f"Cache: {self.hits} hits, {self.revalidated} revalidated (304), {self.misses} misses "
+              f"({hit_rate:.1%} hit rate, {self.size / 1024 ** 2:.1f} MB).")
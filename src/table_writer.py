@@ -0,0 +1,95 @@
+""" This code writes the feature tables in batches.
+    The keys already in a table are loaded into a set once, so the resume
+    check is a lookup, and rows are buffered and appended together. A row
+    left half written by an interrupted append is dropped on the next open.
+"""
+import time
+import csv
+import os
+import pandas as pd
+
+FLUSH_ROWS = 200      # rows buffered before they are written
+FLUSH_SECONDS = 60    # seconds between writes while rows are waiting
+
+class TableWriter:
+    """
+    Buffered writer of one CSV feature table keyed by a column.
+    Rows whose key is already in the table are not written again. The
+    dependents (tables written alongside this one) are flushed before it,
+    so after a crash every key in this table is also in its dependents.
+    Used as a context manager, the buffer is written even if a row fails.
+    """
+    def __init__(self, path, columns, key="user_id", dependents=(), max_rows=FLUSH_ROWS, max_seconds=FLUSH_SECONDS):
+        self.path = path
+        self.columns = columns
+        self.key_index = columns.index(key)
+        self.dependents = list(dependents)
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.rows = []
+        self.flushed_at = time.time()
+        self.keys = set()
+        if os.path.isfile(path) and os.path.getsize(path):
+            self.repair()
+        if os.path.isfile(path) and os.path.getsize(path):
+            self.keys.update(pd.read_csv(path, usecols=[self.key_index]).iloc[:, 0].tolist())
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def repair(self):
+        """
+        Function that truncates the table after its last complete line.
+        """
+        with open(self.path, "rb+") as file:
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) == b"\n":
+                return
+            file.seek(0)
+            file.truncate(file.read().rfind(b"\n") + 1)
+
+    def add(self, row):
+        """
+        Function that buffers a row, writing the buffer
+        when it reaches max_rows or max_seconds.
+        Returns False if the key of the row was already written.
+        """
+        key = row[self.key_index]
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        self.rows.append(row)
+        if len(self.rows) >= self.max_rows or time.time() - self.flushed_at >= self.max_seconds:
+            self.flush()
+        return True
+
+    def flush(self):
+        """
+        Function that writes the dependents and then
+        appends the buffered rows to the table.
+        """
+        for writer in self.dependents:
+            writer.flush()
+        self.flushed_at = time.time()
+        if not self.rows:
+            return
+        with open(self.path, "a", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file, lineterminator=os.linesep)
+            if not file.tell():
+                writer.writerow(self.columns)
+            writer.writerows(self.rows)
+            file.flush()
+            os.fsync(file.fileno())
+        self.rows = []
+
+    def close(self):
+        """
+        Function that writes the rows left in the buffer.
+        """
+        self.flush()
@@ -0,0 +1,217 @@
+""" This code indexes event timestamps for range counts.
+    The timestamps of an event type are sorted once per repository, so the
+    number of events before a date or inside a window, optionally leaving
+    out one author, comes from binary searches instead of a scan.
+    Timestamps come from the Parquet tables, parsed once at conversion, and
+    GHTorrent tables are grouped per repository, user, issue or pull request once.
+"""
+import numpy as np
+import pandas as pd
+import polars as pl
+
+def to_nanoseconds(moment):
+    """
+    Function that converts a timestamp to nanoseconds since the epoch.
+    """
+    return pd.Timestamp(moment).value
+
+def frame_nanoseconds(frame, column):
+    """
+    Function that returns a datetime column of a polars
+    frame as nanoseconds since the epoch.
+    """
+    return frame[column].dt.epoch("ns").to_numpy().astype(np.int64)
+
+class TimestampIndex:
+    """
+    Sorted timestamps of one event type, with the sorted
+    timestamps of each author for "not by this author" counts.
+    Timestamps are nanoseconds since the epoch.
+    """
+    def __init__(self, timestamps, authors=None):
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.order = np.argsort(timestamps, kind="stable")
+        self.timestamps = timestamps[self.order]
+        self.author_timestamps = {}
+        if authors is not None and len(timestamps):
+            # Missing authors (None) are grouped together like any other id
+            codes, uniques = pd.factorize(pd.Series(list(authors), dtype=object), use_na_sentinel=False)
+            by_author = np.lexsort((timestamps, codes))
+            sorted_codes = codes[by_author]
+            sorted_timestamps = timestamps[by_author]
+            starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+            for start, end in zip(starts, np.r_[starts[1:], len(by_author)]):
+                author = uniques[sorted_codes[start]]
+                self.author_timestamps[None if pd.isna(author) else author] = sorted_timestamps[start:end]
+
+    @classmethod
+    def from_frame(cls, frame, time_column, author_column=None):
+        """
+        Function that indexes a polars frame by one of its datetime columns.
+        """
+        authors = frame[author_column].to_list() if author_column else None
+        return cls(frame_nanoseconds(frame, time_column), authors)
+
+    def count_before(self, moment, exclude=None):
+        """
+        Function that counts the events at or before a moment,
+        leaving out the events of the excluded author.
+        """
+        count = np.searchsorted(self.timestamps, moment, "right")
+        if exclude in self.author_timestamps:
+            count -= np.searchsorted(self.author_timestamps[exclude], moment, "right")
+        return int(count)
+
+    def count_between(self, start, end, exclude=None):
+        """
+        Function that counts the events in [start, end),
+        leaving out the events of the excluded author.
+        """
+        count = np.searchsorted(self.timestamps, end, "left") - np.searchsorted(self.timestamps, start, "left")
+        if exclude in self.author_timestamps:
+            author_timestamps = self.author_timestamps[exclude]
+            count -= np.searchsorted(author_timestamps, end, "left") - np.searchsorted(author_timestamps, start, "left")
+        return int(count)
+
+    def rows_before(self, moment):
+        """
+        Function that returns the original row numbers of the
+        events at or before a moment, in time order.
+        """
+        return self.order[:np.searchsorted(self.timestamps, moment, "right")]
+
+    def rows_between(self, start, end):
+        """
+        Function that returns the original row numbers
+        of the events in [start, end), in time order.
+        """
+        return self.order[np.searchsorted(self.timestamps, start, "left"):np.searchsorted(self.timestamps, end, "left")]
+
+def group_rows(keys):
+    """
+    Function that returns the unique keys of a sorted key array
+    with the (start, end) rows of each one.
+    """
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=np.int64)
+    return keys[starts], starts, np.r_[starts[1:], len(keys)].astype(np.int64)
+
+def sorted_by_key(frame, key_column, time_column="created_at"):
+    """
+    Function that drops the rows of a polars frame without
+    a key or a time and sorts the rest by key and time.
+    """
+    return frame.filter(
+        pl.col(key_column).is_not_null() & pl.col(time_column).is_not_null()
+    ).sort([key_column, time_column])
+
+class GroupedTimestamps:
+    """
+    Sorted timestamps of a frame split by a key column (e.g. the
+    watchers of each repository or the repositories each user
+    watches), for "events of this key before a date" counts.
+    """
+    def __init__(self, frame, key_column, time_column="created_at"):
+        frame = sorted_by_key(frame, key_column, time_column)
+        self.timestamps = frame_nanoseconds(frame, time_column)
+        self.keys, self.starts, self.ends = group_rows(frame[key_column].to_numpy())
+
+    def arrays(self):
+        """
+        Function that returns the sorted arrays of the index by name.
+        """
+        return {"timestamps": self.timestamps, "keys": self.keys, "starts": self.starts, "ends": self.ends}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Function that wraps arrays returned by arrays(), e.g. memory-mapped
+        by another process, without copying or sorting them again.
+        """
+        index = cls.__new__(cls)
+        index.timestamps, index.keys = arrays["timestamps"], arrays["keys"]
+        index.starts, index.ends = arrays["starts"], arrays["ends"]
+        return index
+
+    def get(self, key):
+        """
+        Function that returns the sorted timestamps of a key.
+        """
+        position = np.searchsorted(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            return self.timestamps[self.starts[position]:self.ends[position]]
+        return self.timestamps[:0]
+
+    def count_before(self, key, moment):
+        """
+        Function that counts the events of a key at or before a moment.
+        """
+        return int(np.searchsorted(self.get(key), moment, "right"))
+
+class EventTimelines:
+    """
+    GHTorrent events grouped by issue or pull request id. Rows are sorted
+    by (id, created_at) once, with cumulative counts of each action, so the
+    events of a set of ids inside a window come from binary searches.
+    """
+    def __init__(self, frame, id_column, actions=("assigned", "closed", "merged")):
+        frame = sorted_by_key(frame, id_column)
+        self.timestamps = frame_nanoseconds(frame, "created_at")
+        self.ids, self.starts, self.ends = group_rows(frame[id_column].to_numpy())
+        event_actions = frame["action"].to_numpy()
+        self.action_counts = {action: np.r_[0, np.cumsum(event_actions == action)] for action in actions}
+
+    def arrays(self):
+        """
+        Function that returns the sorted arrays of the index by name.
+        """
+        arrays = {"timestamps": self.timestamps, "ids": self.ids, "starts": self.starts, "ends": self.ends}
+        arrays.update({f"action_{action}": counts for action, counts in self.action_counts.items()})
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Function that wraps arrays returned by arrays(), e.g. memory-mapped
+        by another process, without copying or sorting them again.
+        """
+        index = cls.__new__(cls)
+        index.timestamps, index.ids = arrays["timestamps"], arrays["ids"]
+        index.starts, index.ends = arrays["starts"], arrays["ends"]
+        index.action_counts = {name[len("action_"):]: counts for name, counts in arrays.items() if name.startswith("action_")}
+        return index
+
+    def ranges(self, ids):
+        """
+        Function that returns the (start, end) rows of the ids that have events.
+        """
+        ids = np.fromiter(ids, dtype=np.int64, count=len(ids))
+        positions = np.searchsorted(self.ids, ids)
+        found = positions < len(self.ids)
+        found[found] = self.ids[positions[found]] == ids[found]
+        return zip(self.starts[positions[found]].tolist(), self.ends[positions[found]].tolist())
+
+    def count(self, ids, bounds):
+        """
+        Function that returns the number of events and of each action for
+        the given ids, where bounds(timestamps) gives the window rows.
+        """
+        events = 0
+        actions = dict.fromkeys(self.action_counts, 0)
+        for start, end in self.ranges(ids):
+            low, high = bounds(self.timestamps[start:end])
+            events += high - low
+            for action, counts in self.action_counts.items():
+                actions[action] += int(counts[start + high] - counts[start + low])
+        return int(events), actions
+
+    def count_before(self, ids, moment):
+        """
+        Function that counts the events of the ids at or before a moment.
+        """
+        return self.count(ids, lambda timestamps: (0, np.searchsorted(timestamps, moment, "right")))
+
+    def count_between(self, ids, start, end):
+        """
+        Function that counts the events of the ids in [start, end).
+        """
+        return self.count(ids, lambda timestamps: np.searchsorted(timestamps, [start, end], "left"))
@@ -0,0 +1,151 @@
+""" This code stores GitHub user data on disk, keyed by user id.
+    Developers who contribute to many repositories are fetched once
+    per refresh window instead of once per repository.
+"""
+import threading
+import sqlite3
+import json
+import time
+import os
+
+STORE_PATH = "../Cache/users.sqlite"
+STORE_MAX_AGE = 30 * 24 * 3600       # seconds before a user is fetched again
+STORE_MAX_BYTES = 512 * 1024 ** 2    # total size of stored data before LRU eviction
+STORE_BUSY_TIMEOUT = 30              # seconds to wait for a write lock held by another process
+
+class UserStore:
+    """
+    Persistent store of user data keyed by user id and kind
+    (e.g. "profile" or "repos") with LRU eviction.
+    """
+    def __init__(self, path=STORE_PATH, max_age=STORE_MAX_AGE, max_bytes=STORE_MAX_BYTES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.expired = 0
+        self.misses = 0
+        # Worker processes share the file: WAL lets them read while one writes
+        # and the timeout makes a writer wait for the lock instead of failing
+        self.connection = sqlite3.connect(path, timeout=STORE_BUSY_TIMEOUT, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INTEGER,
+                kind TEXT,
+                data TEXT,
+                size INTEGER,
+                fetched_at REAL,
+                last_used REAL,
+                PRIMARY KEY (user_id, kind)
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS users_last_used ON users (last_used)")
+        self.connection.commit()
+        self.size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM users").fetchone()[0]
+
+    def lookup(self, user_id, kind):
+        """
+        Function that returns the stored data of a user and when it was fetched, or None.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT data, fetched_at FROM users WHERE user_id = ? AND kind = ?", (user_id, kind)
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute("UPDATE users SET last_used = ? WHERE user_id = ? AND kind = ?",
+                                    (time.time(), user_id, kind))
+            self.connection.commit()
+        return json.loads(row[0]), row[1]
+
+    def store(self, user_id, kind, data):
+        """
+        Function that stores the data of a user and evicts the
+        least recently used entries above the size bound.
+        """
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self.lock:
+            old = self.connection.execute(
+                "SELECT size FROM users WHERE user_id = ? AND kind = ?", (user_id, kind)
+            ).fetchone()
+            self.connection.execute("INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?, ?)",
+                                    (user_id, kind, text, len(text), now, now))
+            self.size += len(text) - (old[0] if old else 0)
+            self.evict()
+            self.connection.commit()
+
+    def evict(self):
+        """
+        Function that removes least recently used entries
+        until the store fits in max_bytes. Caller holds the lock.
+        """
+        while self.size > self.max_bytes:
+            rows = self.connection.execute(
+                "SELECT user_id, kind, size FROM users ORDER BY last_used LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            for user_id, kind, size in rows:
+                self.connection.execute("DELETE FROM users WHERE user_id = ? AND kind = ?", (user_id, kind))
+                self.size -= size
+                if self.size <= self.max_bytes:
+                    break
+
+    def fetch(self, user_id, kind, fetch_data):
+        """
+        Function that returns the data of a user from the store, calling
+        fetch_data() when it is missing or older than max_age.
+        Empty results are treated as failures and not stored.
+        """
+        entry = self.lookup(user_id, kind)
+        if entry and time.time() - entry[1] < self.max_age:
+            outcome = "hits"
+            data = entry[0]
+        else:
+            outcome = "expired" if entry else "misses"
+            data = fetch_data()
+            if data:
+                self.store(user_id, kind, data)
+        with self.lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+        return data
+
+    def report(self):
+        """
+        Function that prints the hit and miss statistics of the store.
+        """
+        total = self.hits + self.expired + self.misses
+        hit_rate = self.hits / total if total else 0
+        print(f"User store: {self.hits} hits, {self.expired} expired, {self.misses} misses "
+              f"({hit_rate:.1%} hit rate, {self.size / 1024 ** 2:.1f} MB).")
+
+STORE = None  # set by enable_store()
+
+def enable_store(**options):
+    """
+    Function that turns on the user store for this process.
+    Options are passed to UserStore (path, max_age, max_bytes).
+    """
+    global STORE
+    if STORE is None:
+        STORE = UserStore(**options)
+    return STORE
+
+def get_user(user_id, kind, fetch_data):
+    """
+    Function that returns the data of a user through the
+    store when enabled, otherwise calls fetch_data().
+    """
+    if STORE is None:
+        return fetch_data()
+    return STORE.fetch(user_id, kind, fetch_data)
+
+def report():
+    """
+    Function that prints the statistics of the store when enabled.
+    """
+    if STORE is not None:
+        STORE.report()
@@ -0,0 +1,26 @@
+""" Checks that an interrupted incremental merge
+    leaves the previous dataset complete.
+"""
+import pytest
+import dataset_io
+import download_repo_data
+
+def test_interrupted_merge_keeps_dataset(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    dataset_io.write_dataset("repo", "issues", [{"id": i, "title": "old"} for i in range(5)], directory)
+
+    # A crash mid-merge: the writer is never closed or discarded
+    monkeypatch.setattr(dataset_io.DatasetWriter, "discard", lambda writer: writer.abort())
+    monkeypatch.setattr(download_repo_data, "MERGE_PAGE_SIZE", 2)
+    monkeypatch.setattr(download_repo_data, "get_record_key", lambda record: record["id"] if record["id"] < 3 else 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        download_repo_data.merge_dataset("repo", "issues", directory, [{"id": 0, "title": "new"}], append=False)
+
+    assert dataset_io.load_checkpoint("repo", "issues", directory) is None
+    assert dataset_io.dataset_exists("repo", "issues", directory)
+    assert [record["title"] for record in dataset_io.iter_dataset("repo", "issues", directory)] == ["old"] * 5
+
+    monkeypatch.undo()
+    download_repo_data.merge_dataset("repo", "issues", directory, [{"id": 0, "title": "new"}], append=False)
+    records = dataset_io.load_dataset("repo", "issues", directory)
+    assert [(record["id"], record["title"]) for record in records] == [(0, "new")] + [(i, "old") for i in range(1, 5)]
@@ -0,0 +1,185 @@
+""" Checks every column of the Repository Profile, Repository Monthly
+    Activity and Developer Monthly Activity tables on a small repository
+    whose counts are worked out by hand. Developer 1 joins during
+    GHTorrent, developer 2 in the month before MAX_GHTORRENT_DATE, so
+    its month mixes GHTorrent events with the repository's event stream.
+"""
+import itertools
+import json
+import csv
+import os
+import polars as pl
+import dataset_io
+import parallel
+import parquet_store
+import repository_tables
+import developer_monthly_activity
+
+API_URL = "https://api.github.com/repos/owner/repo"
+REPO = {"id": 1000, "name": "repo", "language": "Python"}
+A, B, C, X, Y = 1, 2, 3, 9, 8  # contributors A, B, C and two other users
+EVENT_IDS = itertools.count(1)
+
+CONTRIBUTORS = [
+    {"id": A, "login": "a", "registration_date": "2020-06-01 00:00:00+00:00", "one_year": "yes", "two_years": "no", "LTC": "no"},
+    {"id": B, "login": "b", "registration_date": "2021-02-20 00:00:00+00:00", "one_year": "yes", "two_years": "yes", "LTC": "yes"},
+    # Joined after MAX_GHTORRENT_DATE: no row, but a contributor in the month of B
+    {"id": C, "login": "c", "registration_date": "2021-03-10 00:00:00+00:00", "one_year": "no", "two_years": "no", "LTC": "no"},
+]
+
+def user(user_id):
+    return None if user_id is None else {"id": user_id}
+
+def commit(sha, author, date):
+    return {"sha": sha, "author": user(author), "commit": {"author": {"date": date}}}
+
+def issue(number, author, date):
+    return {"id": 100 + number, "number": number, "url": f"{API_URL}/issues/{number}",
+            "events_url": f"{API_URL}/issues/{number}/events", "user": user(author), "created_at": date}
+
+def pull_request(number, author, date):
+    return {"id": 200 + number, "number": number, "url": f"{API_URL}/pulls/{number}", "user": user(author), "created_at": date}
+
+def event(issue_id, number, action, date):
+    return {"id": next(EVENT_IDS), "issue": {"id": issue_id, "number": number}, "actor": user(X), "event": action, "created_at": date}
+
+DATASETS = {
+    "commits": [
+        commit("c0", A, "2020-06-01T00:00:00Z"),   # A's first commit, on its registration date
+        commit("c1", A, "2020-05-01T00:00:00Z"),
+        commit("c2", X, "2020-05-15T00:00:00Z"),
+        commit("c3", X, "2020-06-01T00:00:00Z"),   # tied with A's registration, before and in the month
+        commit("c4", Y, "2020-06-10T00:00:00Z"),
+        commit("c5", None, "2020-06-11T00:00:00Z"),
+        commit("c6", A, "2020-06-20T00:00:00Z"),
+        commit("c7", Y, "2021-02-25T00:00:00Z"),
+        commit("c8", B, "2021-03-01T00:00:00Z"),
+        commit("c9", X, "2021-03-10T00:00:00Z"),
+    ],
+    "commit_comments": [
+        {"id": 1, "user": user(X), "commit_id": "c2", "created_at": "2020-05-20T00:00:00Z"},
+        {"id": 2, "user": user(A), "commit_id": "c1", "created_at": "2020-06-05T00:00:00Z"},
+        {"id": 3, "user": user(Y), "commit_id": "c6", "created_at": "2020-06-15T00:00:00Z"},
+        {"id": 4, "user": None, "commit_id": "c6", "created_at": "2020-06-16T00:00:00Z"},  # still received by A
+        {"id": 5, "user": user(X), "commit_id": "c8", "created_at": "2021-03-01T00:00:00Z"},
+    ],
+    "issues": [
+        issue(1, X, "2020-05-10T00:00:00Z"),
+        issue(2, A, "2020-06-03T00:00:00Z"),
+        issue(3, Y, "2020-06-20T00:00:00Z"),
+        issue(4, B, "2021-02-25T00:00:00Z"),
+        issue(5, X, "2021-03-08T00:00:00Z"),       # after MAX_GHTORRENT_DATE
+        issue(6, B, "2021-03-09T00:00:00Z"),       # after MAX_GHTORRENT_DATE
+        issue(7, None, "2020-06-02T00:00:00Z"),
+    ],
+    "issue_comments": [
+        {"id": 1, "issue_url": f"{API_URL}/issues/1", "user": user(X), "created_at": "2020-05-20T00:00:00Z"},
+        {"id": 2, "issue_url": f"{API_URL}/issues/2", "user": user(Y), "created_at": "2020-06-05T00:00:00Z"},
+        {"id": 3, "issue_url": f"{API_URL}/issues/2", "user": user(A), "created_at": "2020-06-06T00:00:00Z"},
+        {"id": 4, "issue_url": f"{API_URL}/issues/6", "user": user(X), "created_at": "2021-03-11T00:00:00Z"},
+        {"id": 5, "issue_url": f"{API_URL}/issues/4", "user": user(X), "created_at": "2021-03-01T00:00:00Z"},
+    ],
+    # The repository's event stream, only read for issues and pull requests after MAX_GHTORRENT_DATE
+    "issue_events": [
+        event(101, 1, "closed", "2020-05-11T00:00:00Z"),
+        event(105, 5, "assigned", "2021-03-08T01:00:00Z"),
+        event(105, 5, "closed", "2021-03-12T00:00:00Z"),
+        event(106, 6, "closed", "2021-03-10T00:00:00Z"),
+        event(106, 6, "assigned", "2021-03-25T00:00:00Z"),
+        event(1014, 14, "assigned", "2021-03-08T02:00:00Z"),
+        event(1014, 14, "assigned", "2021-03-09T00:00:00Z"),
+        event(1014, 14, "merged", "2021-03-10T00:00:00Z"),
+        event(1014, 14, "closed", "2021-03-10T00:00:00Z"),
+        event(1015, 15, "closed", "2021-03-11T00:00:00Z"),
+    ],
+    "pull_requests": [
+        pull_request(11, X, "2020-05-20T00:00:00Z"),
+        pull_request(12, A, "2020-06-05T00:00:00Z"),
+        pull_request(13, Y, "2020-06-07T00:00:00Z"),
+        pull_request(14, X, "2021-03-08T00:00:00Z"),   # after MAX_GHTORRENT_DATE
+        pull_request(15, B, "2021-03-09T00:00:00Z"),   # after MAX_GHTORRENT_DATE
+    ],
+    "pull_request_comments": [
+        {"id": 1, "pull_request_url": f"{API_URL}/pulls/11", "user": user(Y), "created_at": "2020-05-25T00:00:00Z"},
+        {"id": 2, "pull_request_url": f"{API_URL}/pulls/13", "user": user(A), "created_at": "2020-06-08T00:00:00Z"},
+        {"id": 3, "pull_request_url": f"{API_URL}/pulls/14", "user": user(Y), "created_at": "2021-03-09T00:00:00Z"},
+        {"id": 4, "pull_request_url": f"{API_URL}/pulls/15", "user": user(X), "created_at": "2021-03-12T00:00:00Z"},
+        {"id": 5, "pull_request_url": f"{API_URL}/pulls/13", "user": user(X), "created_at": "2020-06-10T00:00:00Z"},
+    ],
+}
+
+def ghtorrent_frame(key_column, rows, value_column="action"):
+    return pl.DataFrame(rows, schema=[key_column, value_column, "created_at"], orient="row").with_columns(
+        pl.col("created_at").str.to_datetime(time_zone="UTC").cast(parquet_store.DATETIME)
+    )
+
+GHTORRENT = {
+    "issue_events": ghtorrent_frame("issue_id", [
+        (101, "closed", "2020-05-11T00:00:00Z"), (101, "assigned", "2020-05-12T00:00:00Z"),
+        (101, "labeled", "2020-06-02T00:00:00Z"), (102, "assigned", "2020-06-04T00:00:00Z"),
+        (102, "closed", "2020-06-10T00:00:00Z"), (103, "closed", "2020-06-25T00:00:00Z"),
+        (104, "assigned", "2021-02-26T00:00:00Z"), (104, "closed", "2021-03-05T00:00:00Z"),
+    ]),
+    "pull_events": ghtorrent_frame("pull_request_id", [
+        (211, "merged", "2020-05-21T00:00:00Z"), (211, "closed", "2020-05-21T00:00:00Z"),
+        (212, "closed", "2020-06-06T00:00:00Z"), (213, "assigned", "2020-06-08T00:00:00Z"),
+        (213, "merged", "2020-06-09T00:00:00Z"),
+    ]),
+    "watchers": ghtorrent_frame("repo_id", [
+        (1000, X, "2020-01-01T00:00:00Z"), (1000, Y, "2020-06-01T00:00:00Z"),
+        (1000, X, "2020-12-01T00:00:00Z"), (2000, Y, "2020-01-01T00:00:00Z"),
+    ], "user_id"),
+}
+
+# Rows after (repo_name, repo_id, user_id, registration_date, language), ending with ltc_1, ltc_2, ltc_3
+EXPECTED = {
+    "RepositoryProfiles/rp_repo.csv": {
+        # commits, commit comments, contributors, commits per committer max/min/mean/std/median, issues,
+        # issue comments, issue events/closed/assigned, pull requests, comments, history/merged/closed, watchers
+        A: [2, 1, 0, 2, 2, 2, 0, 2, 1, 1, 2, 1, 1, 1, 1, 2, 1, 1, 2, 1, 0, 0],
+        B: [6, 3, 1, 3, 1, 2, 1, 2, 3, 3, 6, 3, 2, 3, 3, 5, 2, 2, 3, 1, 1, 1],
+    },
+    "RepositoryMonthlyActivity/rma_repo.csv": {
+        # as above for the month after joining, without watchers, std is written twice
+        A: [2, 1, 0, 1, 1, 1, 0, 0, 1, 1, 1, 1, 1, 0, 1, 1, 2, 1, 0, 1, 0, 0],
+        B: [2, 1, 1, 1, 1, 1, 0, 0, 1, 1, 2, 2, 1, 1, 1, 2, 4, 1, 1, 1, 1, 1],
+    },
+    "DeveloperMonthlyActivity/dma_repo.csv": {
+        # commits, comments on them, issues, comments on those after MAX_GHTORRENT_DATE, their events/closed/
+        # assigned, pull requests by others, comments on those after MAX_GHTORRENT_DATE, history/merged/closed
+        A: [2, 2, 1, 0, 2, 1, 1, 1, 0, 2, 1, 0, 1, 0, 0],
+        B: [1, 1, 2, 1, 3, 2, 1, 1, 1, 4, 1, 1, 1, 1, 1],
+    },
+}
+REGISTRATION = {A: "2020-06-01", B: "2021-02-20"}
+
+def write_repository(root):
+    """
+    Function that writes the datasets and filtered contributors of REPO under root.
+    """
+    os.makedirs(os.path.join(root, "Datasets", REPO["name"]))
+    for data_type, records in DATASETS.items():
+        dataset_io.write_dataset(REPO["name"], data_type, records, os.path.join(root, "Datasets", REPO["name"]))
+    os.makedirs(os.path.join(root, "FilteredContributors"))
+    with open(os.path.join(root, "FilteredContributors", f"contributors_{REPO['name']}.json"), "w", encoding="utf-8") as f:
+        json.dump(CONTRIBUTORS, f)
+    for table in EXPECTED:
+        os.makedirs(os.path.join(root, "Tables", os.path.dirname(table)), exist_ok=True)
+    os.makedirs(os.path.join(root, "run"))
+
+def test_feature_columns(tmp_path, monkeypatch):
+    write_repository(str(tmp_path))
+    monkeypatch.chdir(tmp_path / "run")
+
+    repository_tables.process_repo(0, REPO, *repository_tables.build_state(GHTORRENT))
+    # In a worker process, with the indexes shared by the parent
+    parallel.run_repos(developer_monthly_activity.process_repo, [REPO], GHTORRENT, developer_monthly_activity.build_state,
+                       max_workers=1, use_processes=True)
+
+    for table, expected in EXPECTED.items():
+        with open(os.path.join("../Tables", table), "r", newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))[1:]
+        assert rows == [
+            [REPO["name"], str(REPO["id"]), str(user_id), REGISTRATION[user_id], REPO["language"]] + [str(value) for value in values]
+            for user_id, values in expected.items()
+        ], table
@@ -0,0 +1,90 @@
+""" Checks the polars labelling of filter_contributors against
+    the per-contributor loop it replaced.
+"""
+from datetime import datetime, timedelta, timezone
+import random
+import pandas as pd
+import polars as pl
+import pytest
+import parquet_store
+from filter_contributors import label_contributors, HORIZONS, YEAR_LABELS
+
+AS_OF = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def horizon_offset(horizon):
+    """
+    Function that converts a polars duration string to a pandas offset.
+    """
+    if horizon.endswith("mo"):
+        return pd.DateOffset(months=int(horizon[:-2]))
+    return pd.DateOffset(years=int(horizon[:-1]))
+
+def loop_labels(profiles, commits, as_of=AS_OF, horizons=HORIZONS):
+    """
+    Function that labels every contributor one at a time, like the loop
+    of process_contributors before label_contributors.
+    """
+    commit_index = {}
+    for author_id, date in commits:
+        commit_index.setdefault(author_id, []).append(pd.Timestamp(date))
+
+    def has_commit(user_id, start_date, end_date):
+        return "yes" if any(start_date <= date < end_date for date in commit_index.get(user_id, [])) else "no"
+
+    as_of = pd.Timestamp(as_of)
+    labels = {}
+    for user_id, created_date in profiles:
+        if user_id not in commit_index:
+            continue
+        registration_date = min(commit_index[user_id])
+        user_age = (registration_date - pd.Timestamp(created_date)).days
+        if registration_date >= as_of - pd.DateOffset(years=3) or user_age < 0:
+            continue
+        year_dates = [registration_date + pd.DateOffset(years=years) for years in range(1, 5)]
+        label = {"registration_date": registration_date, "user_age": user_age}
+        for label_name, start_date, end_date in zip(YEAR_LABELS, year_dates, year_dates[1:]):
+            label[label_name] = has_commit(user_id, start_date, end_date)
+        label["LTC"] = "yes" if all(label[name] == "yes" for name in YEAR_LABELS) else "no"
+        for horizon in horizons:
+            start_date = registration_date + horizon_offset(horizon)
+            label[f"LTC_{horizon}"] = None if start_date >= as_of else has_commit(user_id, start_date, as_of)
+        labels[user_id] = label
+    return labels
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_labels_match_loop(seed):
+    rng = random.Random(seed)
+    start = datetime(2010, 1, 1, tzinfo=timezone.utc)
+    span = int((AS_OF - start).total_seconds())
+    # Month ends and leap days exercise the clamping of the offsets
+    anchors = [datetime(2016, 2, 29, 12, tzinfo=timezone.utc), datetime(2019, 1, 31, tzinfo=timezone.utc)]
+    profiles, commits = [], []
+    for user_id in range(1, 81):
+        profiles.append((user_id, start + timedelta(seconds=rng.randrange(span // 2))))
+        first = anchors[user_id % 2] if user_id % 10 == 0 else start + timedelta(seconds=rng.randrange(span))
+        commits.append((user_id, first))
+        if user_id % 3 == 0:  # a commit in each of the first three years
+            commits.extend((user_id, first + timedelta(days=days)) for days in (400, 800, 1150))
+        for _ in range(rng.randrange(8)):
+            commits.append((user_id, first + timedelta(days=rng.choice([0, 181, 182, 365, 366, 730, 1095, 1500, 2000]),
+                                                       seconds=rng.randrange(-5, 5))))
+    commits.append((999, start))  # author who is not a contributor
+
+    profile_frame = pl.DataFrame({
+        "id": [user_id for user_id, _ in profiles],
+        "created_date": [created_date for _, created_date in profiles],
+    }, schema={"id": pl.Int64, "created_date": parquet_store.DATETIME})
+    commit_frame = pl.DataFrame({
+        "author_id": [author_id for author_id, _ in commits],
+        "date": [date for _, date in commits],
+    }, schema={"author_id": pl.Int64, "date": parquet_store.DATETIME})
+
+    expected = loop_labels(profiles, commits)
+    labels = {row["id"]: row for row in label_contributors(profile_frame, commit_frame, AS_OF).iter_rows(named=True)}
+
+    assert expected and labels.keys() == expected.keys()
+    for user_id, label in expected.items():
+        row = labels[user_id]
+        assert pd.Timestamp(row["registration_date"]) == label["registration_date"]
+        for name in ["user_age", "LTC"] + YEAR_LABELS + [f"LTC_{horizon}" for horizon in HORIZONS]:
+            assert row[name] == label[name], (user_id, name)
@@ -0,0 +1,11 @@
+""" Checks that the sync and async fetchers cache a page under one key.
+"""
+import github_api
+from download_repo_data import page_url
+
+def test_cache_key_is_shared_between_fetchers():
+    url = "https://api.github.com/repos/owner/repo/issues"
+    sync_key = github_api.cache_key(url, {"state": "all", "per_page": 100, "page": 2})
+    assert github_api.cache_key(page_url(f"{url}?state=all&per_page=100", 2)) == sync_key
+    assert github_api.cache_key(f"{url}?page=2&per_page=100&state=all") == sync_key
+    assert github_api.cache_key(url, {"state": "all", "page": 3}) != sync_key
@@ -0,0 +1,41 @@
+""" Checks the sweep line commit statistics against computing them
+    from scratch for every developer with the statistics module.
+"""
+import random
+import statistics
+import pytest
+from order_statistics import sweep_statistics, EMPTY_STATISTICS
+
+def brute_statistics(timestamps, committers, start, end, developer_id):
+    """
+    Function that returns the rounded max, min, mean, std and median of
+    the commits per committer in [start, end], without the developer.
+    """
+    counts = {}
+    for timestamp, committer in zip(timestamps, committers):
+        if start <= timestamp <= end and committer != developer_id:
+            counts[committer] = counts.get(committer, 0) + 1
+    occurrences = list(counts.values())
+    if not occurrences:
+        return EMPTY_STATISTICS
+    return (max(occurrences), min(occurrences), round(statistics.mean(occurrences)),
+            round(statistics.stdev(occurrences)) if len(occurrences) > 1 else 0, round(statistics.median(occurrences)))
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+@pytest.mark.parametrize("width", [0, 5, 31, 300])
+def test_sweep_matches_brute_force(seed, width):
+    rng = random.Random(seed)
+    # Few distinct timestamps so commits and registrations tie
+    timestamps = [rng.randrange(0, 1000, 5) for _ in range(rng.randrange(0, 400))]
+    committers = [rng.choice([None, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]) for _ in timestamps]
+    queries = []
+    for _ in range(60):
+        # Like a month after the registration, the window end never moves back
+        developer_time = rng.randrange(-50, 1050, 5)
+        queries.append((developer_time, developer_time + width, rng.randrange(0, 12)))
+
+    results = sweep_statistics(timestamps, committers, queries)
+
+    for (developer_time, month_time, developer_id), (before, month) in zip(queries, results):
+        assert before == brute_statistics(timestamps, committers, float("-inf"), developer_time, developer_id)
+        assert month == brute_statistics(timestamps, committers, developer_time, month_time - 1, developer_id)
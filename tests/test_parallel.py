@@ -0,0 +1,50 @@
+""" Checks that the state shared with worker processes
+    answers the same counts as the state it was written from.
+"""
+import os
+import numpy as np
+import polars as pl
+import pytest
+import parallel
+import parquet_store
+from timestamp_index import EventTimelines, GroupedTimestamps
+
+def test_shared_state_matches_built_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel, "SHARED_DIRECTORY", str(tmp_path))
+    events = pl.DataFrame({
+        "issue_id": [3, 1, 3, None, 1, 2],
+        "action": ["closed", "assigned", "merged", "closed", "closed", "assigned"],
+        "created_at": [5, 1, 2, 3, 1, 9],
+    }, schema={"issue_id": pl.Int64, "action": pl.Utf8, "created_at": pl.Int64}).with_columns(
+        pl.from_epoch("created_at", "s").dt.replace_time_zone("UTC").cast(parquet_store.DATETIME)
+    )
+    watchers = events.rename({"issue_id": "repo_id"})
+    state = (EventTimelines(events, "issue_id"), GroupedTimestamps(watchers, "repo_id"), events, "../Tables")
+
+    shared, paths = parallel.share_state(state)
+    timelines, repo_watchers, frame, directory = parallel.load_state(shared)
+
+    assert isinstance(timelines.timestamps, np.memmap) and isinstance(repo_watchers.timestamps, np.memmap)
+    for ids in [{1}, {1, 2, 3}, {4}]:
+        assert timelines.count_between(ids, 10 ** 9, 6 * 10 ** 9) == state[0].count_between(ids, 10 ** 9, 6 * 10 ** 9)
+        assert timelines.count_before(ids, 10 ** 10) == state[0].count_before(ids, 10 ** 10)
+    for repo_id in [1, 2, 3, 4]:
+        assert repo_watchers.count_before(repo_id, 2 * 10 ** 9) == state[1].count_before(repo_id, 2 * 10 ** 9)
+    assert frame.equals(events) and directory == "../Tables"
+    assert all(os.path.exists(path) for path in paths)
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="needs the mappings of the process")
+def test_shared_frames_are_memory_mapped(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel, "SHARED_DIRECTORY", str(tmp_path))
+    frame = pl.DataFrame({"user_id": np.arange(1000), "repo_id": np.arange(1000) % 7})
+
+    shared, paths = parallel.share_state((frame,))
+    loaded, = parallel.load_state(shared)
+
+    with open("/proc/self/maps", "r", encoding="utf-8") as f:
+        ranges = [line.split()[0].split("-") for line in f if line.rstrip().endswith(paths[0])]
+    assert ranges and loaded.equals(frame)
+    for column in loaded.to_arrow().columns:
+        for chunk in column.chunks:
+            address = chunk.buffers()[1].address
+            assert any(int(start, 16) <= address < int(end, 16) for start, end in ranges)
@@ -0,0 +1,53 @@
+""" Checks the event timelines of repositories whose
+    issue events or pull requests were not downloaded.
+"""
+import warnings
+import dataset_io
+import parquet_store
+from timestamp_index import EventTimelines
+
+EVENTS = [
+    {"id": 1, "issue": {"id": 100, "number": 1}, "actor": {"id": 5}, "event": "closed", "created_at": "2021-04-01T00:00:00Z"},
+    {"id": 2, "issue": {"id": 200, "number": 2}, "actor": None, "event": "merged", "created_at": "2021-04-02T00:00:00Z"},
+]
+
+def test_missing_sources_give_empty_timelines(tmp_path):
+    directory = str(tmp_path)
+    dataset_io.write_dataset("repo", "pull_requests", [{"id": 1, "number": 2}], directory)
+
+    for name, id_column in parquet_store.TIMELINES.items():
+        timeline = parquet_store.load_timeline("repo", name, directory)
+        assert timeline.is_empty()
+        assert timeline.schema["created_at"] == parquet_store.DATETIME
+        events, actions = EventTimelines(timeline, id_column).count_between({1, 2}, 0, 10 ** 18)
+        assert events == 0 and not any(actions.values())
+
+def test_timelines_split_issue_events(tmp_path):
+    directory = str(tmp_path)
+    dataset_io.write_dataset("repo", "pull_requests", [{"id": 10, "number": 2}], directory)
+    dataset_io.write_dataset("repo", "issue_events", EVENTS, directory)
+
+    issue_timeline = parquet_store.load_timeline("repo", "issue_timeline", directory)
+    pull_timeline = parquet_store.load_timeline("repo", "pull_timeline", directory)
+    assert sorted(issue_timeline["issue_id"].to_list()) == [100, 200]
+    assert pull_timeline["pull_request_id"].to_list() == [10]
+    assert pull_timeline["action"].to_list() == ["merged"]
+
+def test_missing_pull_requests_keep_issue_timeline(tmp_path):
+    directory = str(tmp_path)
+    dataset_io.write_dataset("repo", "issue_events", EVENTS, directory)
+
+    parquet_store.convert_repo("repo", directory)
+    assert sorted(parquet_store.load_timeline("repo", "issue_timeline", directory)["issue_id"].to_list()) == [100, 200]
+    assert parquet_store.load_timeline("repo", "pull_timeline", directory).is_empty()
+
+def test_ghtorrent_rows_are_filtered_by_id(tmp_path):
+    (tmp_path / "issue_events_filtered.csv").write_text(
+        "issue_id,action,created_at\n1,closed,2020-01-01 00:00:00\n2,assigned,2020-01-02 00:00:00\n3,closed,2020-01-03 00:00:00\n",
+        encoding="utf-8")
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        events = parquet_store.load_ghtorrent("issue_events", "issue_id", {3, 1}, str(tmp_path))
+    assert not caught and events["issue_id"].to_list() == [1, 3]
+    assert events.schema["created_at"] == parquet_store.DATETIME
@@ -0,0 +1,44 @@
+""" Checks that the feature tables are appended in batches,
+    resumed by key and kept whole after errors.
+"""
+import pandas as pd
+import pytest
+from table_writer import TableWriter
+
+COLUMNS = ["repo_name", "user_id", "value"]
+
+def test_rows_are_appended_and_resumed(tmp_path):
+    path = str(tmp_path / "table.csv")
+    with TableWriter(path, COLUMNS, max_rows=2) as writer:
+        for user_id in range(5):
+            assert writer.add(["repo", user_id, user_id * 10])
+        assert not writer.add(["repo", 1, 0])
+
+    writer = TableWriter(path, COLUMNS)
+    assert 4 in writer and 5 not in writer
+    with writer:
+        writer.add(["repo", 5, 50])
+    assert pd.read_csv(path)["user_id"].tolist() == [0, 1, 2, 3, 4, 5]
+
+def test_buffer_is_written_on_error(tmp_path):
+    path = str(tmp_path / "table.csv")
+    with pytest.raises(ValueError):
+        with TableWriter(path, COLUMNS) as writer:
+            writer.add(["repo", 1, 10])
+            raise ValueError("failed on the next developer")
+    assert pd.read_csv(path)["user_id"].tolist() == [1]
+
+def test_half_written_row_is_dropped(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text("repo_name,user_id,value\nrepo,1,10\nrepo,2,", encoding="utf-8")
+    with TableWriter(str(path), COLUMNS) as writer:
+        assert 1 in writer and 2 not in writer
+        writer.add(["repo", 2, 20])
+    assert pd.read_csv(path)["value"].tolist() == [10, 20]
+
+def test_dependents_are_written_first(tmp_path):
+    activity = TableWriter(str(tmp_path / "activity.csv"), COLUMNS)
+    profile = TableWriter(str(tmp_path / "profile.csv"), COLUMNS, dependents=[activity], max_rows=1)
+    activity.add(["repo", 1, 10])
+    profile.add(["repo", 1, 10])
+    assert pd.read_csv(tmp_path / "activity.csv")["user_id"].tolist() == [1]